@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, TextIO
+
+from markets.client_manager import client_manager
+from utils.cache import TTLCache
+from utils.rate_limiter import RateLimiter
+from utils.session_manager import session_manager
+from core.market_aggregator import ALL_MARKETS, get_market_key, market_rate_limiters
+from core.pricing import (
+    GIFT_OK, extract_gift_link, gift_details_to_dict, lookup_gift, normalize_link, price_markets
+)
+
+log = logging.getLogger("batch_pricer")
+
+READ_CHUNK_SIZE = 64 * 1024
+CHECKPOINT_INTERVAL = 5.0
+
+
+class Checkpoint:
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self.lines_done = 0
+        self.done_ahead: Set[int] = set()
+        # Output size when the checkpoint was saved: rows past it belong to no checkpointed line.
+        self.output_offset: Optional[int] = None
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.lines_done = data.get("lines_done", 0)
+        self.done_ahead = set(data.get("done_ahead", []))
+        self.output_offset = data.get("output_offset")
+
+    def mark_done(self, line_number: int) -> None:
+        self.done_ahead.add(line_number)
+        while self.lines_done + 1 in self.done_ahead:
+            self.lines_done += 1
+            self.done_ahead.discard(self.lines_done)
+
+    def is_done(self, line_number: int) -> bool:
+        return line_number <= self.lines_done or line_number in self.done_ahead
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "lines_done": self.lines_done,
+                "done_ahead": sorted(self.done_ahead),
+                "output_offset": self.output_offset,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+class BatchPricer:
+    def __init__(self, output: TextIO, checkpoint: Checkpoint, concurrency: int, dedupe_size: int) -> None:
+        self._output = output
+        self._checkpoint = checkpoint
+        self._concurrency = concurrency
+        self._prices: TTLCache = TTLCache(maxsize=dedupe_size)
+        self._inflight: Dict[tuple, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._last_checkpoint = time.monotonic()
+        self.counts: Dict[str, int] = {}
+
+    async def _price_markets(self, gift_details) -> Dict[str, Any]:
+        key = get_market_key(gift_details)
+        cached = self._prices.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(price_markets(gift_details))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        prices = await asyncio.shield(task)
+        if not any(entry.get("error") for market in prices.values() for entry in market.values()):
+            self._prices.set(key, prices)
+        return prices
+
+    async def _price_line(self, line_number: int, text: str) -> Dict[str, Any]:
+        link = extract_gift_link(text)
+        if not link:
+            return {"line": line_number, "input": text, "status": "invalid"}
+
+        link = normalize_link(link)
+        try:
+            status, gift_details = await lookup_gift(link)
+            if status != GIFT_OK:
+                return {"line": line_number, "link": link, "status": status}
+            # Only the prices are shared between links with the same attributes; "gift" is this link's own.
+            prices = await self._price_markets(gift_details)
+            return {
+                "line": line_number,
+                "link": link,
+                "status": GIFT_OK,
+                "gift": gift_details_to_dict(gift_details),
+                "prices": prices,
+            }
+        except Exception as e:
+            log.error("Error pricing line %d (%s): %s", line_number, link, e)
+            return {"line": line_number, "link": link, "status": "error"}
+
+    def _write(self, row: Dict[str, Any]) -> None:
+        self._output.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._checkpoint.mark_done(row["line"])
+        self.counts[row["status"]] = self.counts.get(row["status"], 0) + 1
+
+        now = time.monotonic()
+        if now - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+            self.flush()
+            self._last_checkpoint = now
+
+    def flush(self) -> None:
+        self._output.flush()
+        if self._output.seekable():
+            self._checkpoint.output_offset = self._output.tell()
+        self._checkpoint.save()
+
+    async def run(self, source: TextIO) -> None:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._concurrency * 2)
+
+        async def produce() -> None:
+            line_number = 0
+            while True:
+                lines: List[str] = await asyncio.to_thread(source.readlines, READ_CHUNK_SIZE)
+                if not lines:
+                    break
+                for text in lines:
+                    line_number += 1
+                    text = text.strip()
+                    if self._checkpoint.is_done(line_number):
+                        continue
+                    if not text:
+                        # No output row, but the line is finished: lines_done must still move past it.
+                        self._checkpoint.mark_done(line_number)
+                        continue
+                    await queue.put((line_number, text))
+            for _ in range(self._concurrency):
+                await queue.put(None)
+
+        async def work() -> None:
+            while (item := await queue.get()) is not None:
+                self._write(await self._price_line(*item))
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            await asyncio.gather(producer, *(work() for _ in range(self._concurrency)))
+        finally:
+            producer.cancel()
+            self.flush()
+
+
+def parse_rate_limits(values: List[str]) -> Dict[str, int]:
+    limits = {}
+    for value in values:
+        market, _, rate = value.partition("=")
+        if market not in ALL_MARKETS or not rate.isdigit():
+            raise argparse.ArgumentTypeError(f"invalid --lookup-rate '{value}', expected e.g. portals=40")
+        limits[market] = int(rate)
+    return limits
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Price gift links from a file or stdin and write one JSON line per link.")
+    parser.add_argument("input", nargs="?", default="-", help="File with one gift link per line, or - for stdin.")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout.")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Links priced concurrently.")
+    parser.add_argument("--lookup-rate", action="append", default=[], metavar="MARKET=PER_MINUTE",
+                        help="Price lookups per minute per market, e.g. --lookup-rate portals=40 (repeatable). "
+                             "One lookup sends a few HTTP requests.")
+    parser.add_argument("--dedupe-size", type=int, default=10000,
+                        help="How many distinct attribute keys to remember for deduplication.")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint for file output).")
+    parser.add_argument("--resume", action="store_true", help="Skip lines recorded in the checkpoint and append to the output.")
+    args = parser.parse_args(argv)
+    if args.checkpoint is None and args.output != "-":
+        args.checkpoint = f"{args.output}.checkpoint"
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint when writing to stdout")
+    if args.resume and args.input == "-":
+        log.warning("Resuming from stdin assumes the same lines are fed again in the same order.")
+    try:
+        args.lookup_rate = parse_rate_limits(args.lookup_rate)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    return args
+
+
+def truncate_output(path: str, offset: int) -> None:
+    """Drop rows written after the last checkpoint (possibly a half-written line) before appending."""
+    if os.path.exists(path) and os.path.getsize(path) > offset:
+        log.warning("Discarding %d bytes written to %s after the last checkpoint.", os.path.getsize(path) - offset, path)
+        os.truncate(path, offset)
+
+
+async def run(args: argparse.Namespace) -> None:
+    for market, per_minute in args.lookup_rate.items():
+        market_rate_limiters[market] = RateLimiter(per_minute)
+
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.resume:
+        checkpoint.load()
+        log.warning("Resuming after line %d.", checkpoint.lines_done)
+
+    if args.resume and args.output != "-" and checkpoint.output_offset is not None:
+        truncate_output(args.output, checkpoint.output_offset)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "a" if args.resume else "w", encoding="utf-8")
+    pricer = BatchPricer(output, checkpoint, args.concurrency, args.dedupe_size)
+    started = time.monotonic()
+    try:
+        await pricer.run(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        await client_manager.stop_all()
+        await session_manager.close()
+        log.warning("Priced %s in %.1fs.", pricer.counts, time.monotonic() - started)
+
+
+def main() -> None:
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    args = parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nInterrupted. Re-run with --resume to continue from the checkpoint.", file=sys.stderr)
@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+import main
+import markets.mrkt_fetcher as mrkt_fetcher
+import markets.portals_fetcher as portals_fetcher
+import markets.tonnel_fetcher as tonnel_fetcher
+import utils.converter as converter
+from core.market_aggregator import price_snapshots
+from utils.cache import negative_cache
+
+from .stubs import UPSTREAMS, FakeInitDataProvider, StubConfig, StubServer, UpstreamProfile
+
+COLLECTIONS = ["PlushPepe", "DurovsCap", "HomemadeCake", "JellyBunny", "SnoopDogg", "LootBag", "SwissWatch"]
+
+
+class Scenario(NamedTuple):
+    description: str
+    profiles: Dict[str, UpstreamProfile]
+    distinct_gifts: int = 200
+    missing_rate: float = 0.05
+    no_listing_rate: float = 0.1
+    init_data_latency_ms: float = 150.0
+    init_data_failure_rate: float = 0.0
+    send_latency_ms: float = 40.0
+
+
+FAST = UpstreamProfile(latency_ms=15)
+MARKET = UpstreamProfile(latency_ms=120, jitter=0.5)
+
+SCENARIOS: Dict[str, Scenario] = {
+    "baseline": Scenario(
+        "Healthy upstreams, mostly distinct gifts",
+        {name: MARKET if name not in ("tme", "tonapi", "nobitex") else FAST for name in UPSTREAMS},
+    ),
+    "hot_gifts": Scenario(
+        "Healthy upstreams, a handful of gifts asked about repeatedly",
+        {name: MARKET if name not in ("tme", "tonapi", "nobitex") else FAST for name in UPSTREAMS},
+        distinct_gifts=10,
+    ),
+    "slow_markets": Scenario(
+        "Market APIs with long, heavy-tailed latency",
+        {name: UpstreamProfile(latency_ms=600, jitter=0.9) if name not in ("tme", "tonapi", "nobitex") else FAST for name in UPSTREAMS},
+    ),
+    "flaky": Scenario(
+        "Market APIs returning 5xx and 429 responses",
+        {
+            name: UpstreamProfile(latency_ms=120, jitter=0.5, error_rate=0.05, rate_limit_rate=0.05)
+            if name not in ("tme", "tonapi", "nobitex") else FAST
+            for name in UPSTREAMS
+        },
+        init_data_failure_rate=0.02,
+    ),
+    "spam": Scenario(
+        "Mostly invalid links, repeated",
+        {name: MARKET if name not in ("tme", "tonapi", "nobitex") else FAST for name in UPSTREAMS},
+        distinct_gifts=20,
+        missing_rate=0.8,
+    ),
+}
+
+
+class FakeMessage:
+    def __init__(self, send_latency_ms: float, replies: Counter) -> None:
+        self._send_latency_ms = send_latency_ms
+        self._replies = replies
+
+    async def reply_text(self, text: str, **kwargs) -> None:
+        await asyncio.sleep(self._send_latency_ms / 1000)
+        if text.startswith("🎁"):
+            outcome = "price"
+        elif text.startswith("Gift not found"):
+            outcome = "not_found"
+        else:
+            outcome = "error"
+        self._replies[outcome] += 1
+
+
+def point_fetchers_at(base_url: str, init_data_provider: FakeInitDataProvider) -> None:
+    converter.TONAPI_URL = f"{base_url}/tonapi/v2/rates?tokens=ton&currencies=usd"
+    converter.NOBITEX_URL = f"{base_url}/nobitex/market/stats?srcCurrency=usdt"
+    tonnel_fetcher.TONNEL_API_URL = f"{base_url}/tonnel/api"
+    portals_fetcher.PORTALS_API_URL = f"{base_url}/portals/api"
+    mrkt_fetcher.MRKT_API_URL = f"{base_url}/mrkt/api/v1"
+    portals_fetcher.get_webapp_init_data = init_data_provider
+    mrkt_fetcher.get_webapp_init_data = init_data_provider
+
+
+def reset_caches() -> None:
+    negative_cache.clear()
+    price_snapshots.clear()
+    main.response_cache.clear()
+    converter.get_rates.cache_clear()
+
+
+def build_workload(scenario: Scenario, total: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    gifts = [f"{rng.choice(COLLECTIONS)}-{rng.randint(1, 99999)}" for _ in range(scenario.distinct_gifts)]
+    missing = [f"missing-{i}" for i in range(max(1, scenario.distinct_gifts // 4))]
+    return [
+        rng.choice(missing) if rng.random() < scenario.missing_rate else rng.choice(gifts)
+        for _ in range(total)
+    ]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_scenario(name: str, scenario: Scenario, total: int, concurrency: int, seed: int) -> dict:
+    stub = StubServer(StubConfig(scenario.profiles, scenario.no_listing_rate, seed))
+    await stub.start()
+    init_data_provider = FakeInitDataProvider(scenario.init_data_latency_ms, scenario.init_data_failure_rate, seed)
+    point_fetchers_at(stub.base_url, init_data_provider)
+    reset_caches()
+
+    replies: Counter = Counter()
+    latencies: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for slug in build_workload(scenario, total, seed):
+        queue.put_nowait(f"{stub.base_url}/tme/nft/{slug}")
+
+    async def worker() -> None:
+        while not queue.empty():
+            link = queue.get_nowait()
+            started = time.perf_counter()
+            await main.process_gift_link(link, FakeMessage(scenario.send_latency_ms, replies), "stub_bot")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await stub.stop()
+
+    latencies.sort()
+    upstream_calls = dict(stub.calls)
+    upstream_calls.update({f"init_data_{k}": v for k, v in init_data_provider.calls.items()})
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p90": round(percentile(latencies, 0.90) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        },
+        "replies": dict(replies),
+        "upstream_calls": dict(sorted(upstream_calls.items())),
+        "upstream_calls_per_request": round(sum(stub.calls[u] for u in UPSTREAMS) / total, 2) if total else 0.0,
+    }
+
+
+def print_report(result: dict) -> None:
+    latency = result["latency_ms"]
+    print(f"\n=== {result['scenario']}: {SCENARIOS[result['scenario']].description}")
+    print(f"requests={result['requests']} concurrency={result['concurrency']} elapsed={result['elapsed_s']}s "
+          f"throughput={result['throughput_rps']} req/s")
+    print(f"latency ms: p50={latency['p50']} p90={latency['p90']} p99={latency['p99']} max={latency['max']}")
+    print(f"replies: {result['replies']}")
+    print(f"upstream calls ({result['upstream_calls_per_request']} per request):")
+    for upstream, count in result["upstream_calls"].items():
+        print(f"  {upstream:<28} {count}")
+
+
+async def run(args: argparse.Namespace) -> List[dict]:
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        result = await run_scenario(name, SCENARIOS[name], args.requests, args.concurrency, args.seed)
+        print_report(result)
+        results.append(result)
+    await main.session_manager.close()
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Drive synthetic /p requests against local upstream stubs.")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all).")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="Synthetic /p updates per scenario.")
+    parser.add_argument("-c", "--concurrency", type=int, default=50, help="Updates processed concurrently.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file.")
+    return parser.parse_args(argv)
+
+
+def cli(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.ERROR)
+    results = asyncio.run(run(args))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    try:
+        cli()
+    except KeyboardInterrupt:
+        sys.exit(130)
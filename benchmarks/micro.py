@@ -0,0 +1,162 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+import main
+from core.gift_parser import parse_gift_page
+from core.market_aggregator import MarketResult
+from core.message_formatter import format_market_output
+from utils.converter import format_irr
+
+from .stubs import render_gift_page
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The parser parity test's fixture pages, so benchmark and baselines always see the same corpus.
+PAGES_DIR = os.path.join(ROOT, "tests", "fixtures", "gift_pages")
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+def load_pages() -> Dict[str, str]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return pages
+
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    benchmarks: Dict[str, Callable[[], object]] = {}
+
+    for name, html in load_pages().items():
+        benchmarks[f"parse_gift_page[{name}]"] = lambda html=html: parse_gift_page(html, "https://t.me/nft/bench-1")
+
+    chatter = "Selling my collection, DM me for prices, no lowballers please 🙏 " * 60
+    benchmarks["extract_gift_link[long_hit]"] = lambda text=chatter + " https://t.me/nft/PlushPepe-1234": main.extract_gift_link(text)
+    benchmarks["extract_gift_link[long_miss]"] = lambda text=chatter: main.extract_gift_link(text)
+
+    gift_details = parse_gift_page(render_gift_page("PlushPepe-1234"), "https://t.me/nft/PlushPepe-1234")
+    market_prices = {
+        "tonnel": MarketResult(1234.5, False, 1310.0, False),
+        "portals": MarketResult(1199.99, False, None, False),
+        "mrkt": MarketResult(1_250_000_000_000, False, None, True),
+    }
+    benchmarks["build_price_message"] = lambda: main.build_price_message(
+        "https://t.me/nft/PlushPepe-1234", gift_details, market_prices, 3.12, 1_050_000.0
+    )
+    benchmarks["format_market_output"] = lambda: format_market_output(
+        "Tonnel", "https://t.me/tonnel_network_bot", 1234.5, False, 1310.0, False, 3.12, 1_050_000.0, 1.06
+    )
+    benchmarks["format_irr"] = lambda: format_irr(4_053_123_456)
+    return benchmarks
+
+
+def reference_workload() -> str:
+    """Fixed pure-Python work (dict, str, sort) timed next to each benchmark to cancel machine speed drift."""
+    squares = {}
+    for i in range(200):
+        squares[str(i)] = i * i
+    return "".join(sorted(squares)[:50])
+
+
+def calibrated_number(timer: timeit.Timer, min_time: float) -> int:
+    number, elapsed = timer.autorange()
+    return max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Tuple[float, float]:
+    """Median ns per call, and median cost relative to reference_workload, over `repeat` rounds.
+
+    Each round times the reference right before and after the benchmark. On shared or throttled
+    machines raw timings drift by tens of percent between runs; the ratio stays within a few.
+    """
+    timer, reference = timeit.Timer(func), timeit.Timer(reference_workload)
+    number = calibrated_number(timer, min_time)
+    reference_number = calibrated_number(reference, min_time / 4)
+    per_call, relative = [], []
+    for _ in range(repeat):
+        before = reference.timeit(reference_number) / reference_number
+        value = timer.timeit(number) / number
+        after = reference.timeit(reference_number) / reference_number
+        per_call.append(value)
+        relative.append(value / ((before + after) / 2))
+    return statistics.median(per_call) * 1e9, statistics.median(relative)
+
+
+def load_baselines() -> Dict[str, Tuple[float, float]]:
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    results_ns = data.get("results_ns", {})
+    return {name: (results_ns.get(name, 0.0), relative) for name, relative in data.get("results_ref", {}).items()}
+
+
+def save_baselines(results: Dict[str, Tuple[float, float]], repeat: int, min_time: float) -> None:
+    with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "min_time": min_time,
+            "results_ns": {name: round(ns, 1) for name, (ns, _) in results.items()},
+            "results_ref": {name: round(relative, 4) for name, (_, relative) in results.items()},
+        }, f, indent=2)
+        f.write("\n")
+
+
+def run(args: argparse.Namespace) -> int:
+    baselines = load_baselines()
+    results: Dict[str, Tuple[float, float]] = {}
+    regressions: List[str] = []
+
+    print(f"{'benchmark':<48} {'ns/op':>12} {'x ref':>9} {'baseline':>9} {'change':>9}")
+    for name, func in build_benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        ns, relative = results[name] = measure(func, args.repeat, args.min_time)
+        baseline = baselines.get(name, (0.0, 0.0))[1]
+        if baseline:
+            change = (relative - baseline) / baseline
+            flag = " !" if change > args.threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<48} {ns:>12,.0f} {relative:>9.3f} {baseline:>9.3f} {change:>+8.1%}{flag}")
+        else:
+            print(f"{name:<48} {ns:>12,.0f} {relative:>9.3f} {'-':>9} {'-':>9}")
+
+    if args.save:
+        # Keep baselines of benchmarks skipped by --filter, drop those that no longer exist.
+        names = set(build_benchmarks())
+        kept = {name: result for name, result in baselines.items() if name in names}
+        save_baselines({**kept, **results}, args.repeat, args.min_time)
+        print(f"\nSaved baselines to {BASELINES_PATH}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1 if args.check else 0
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the CPU-side hot paths.")
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name contains this string.")
+    parser.add_argument("--repeat", type=int, default=15, help="Timing runs per benchmark; the median is reported.")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per timing run.")
+    # Above the run-to-run spread of the reference-relative cost on unchanged code (up to ~12%, ~20% for
+    # sub-microsecond benchmarks), well below the 28-53% swings of raw timings.
+    parser.add_argument("--threshold", type=float, default=0.3, help="Relative slowdown reported as a regression.")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baselines.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 on regressions.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.ERROR)
+    sys.exit(run(parse_args()))
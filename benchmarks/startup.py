@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+REPO_PACKAGES = ("main", "core", "markets", "utils")
+
+# Runs in a fresh interpreter and mirrors main.main() up to `run_polling()`, minus the network calls.
+# The deferred imports start last, as in main(), and overlap with polling's first requests there.
+PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from telegram.ext import ApplicationBuilder
+ApplicationBuilder().token("123456:startup-benchmark").build()
+built = time.perf_counter()
+main.preload_in_background().join()
+preloaded = time.perf_counter()
+print(json.dumps({
+    "import_main": imported - started,
+    "build_application": built - imported,
+    "deferred_imports_done": preloaded - started,
+}))
+"""
+
+
+def run_probe() -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    modules: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        if len(indent) > 2:
+            continue
+        # Repo modules are reported individually, third-party ones per top-level package.
+        # The background import thread interleaves its lines, so take the largest entry.
+        package = name.split(".")[0]
+        key = name if package in REPO_PACKAGES else package
+        modules[key] = max(modules.get(key, 0.0), int(cumulative_us) / 1e6)
+    return {"phases": phases, "modules": modules}
+
+
+def summarize(runs: List[dict], top: int) -> dict:
+    phases: Dict[str, List[float]] = defaultdict(list)
+    modules: Dict[str, List[float]] = defaultdict(list)
+    for run in runs:
+        for name, seconds in run["phases"].items():
+            phases[name].append(seconds)
+        for name, seconds in run["modules"].items():
+            modules[name].append(seconds)
+
+    phase_ms = {name: round(statistics.median(values) * 1000, 1) for name, values in phases.items()}
+    phase_ms["ready_to_poll"] = round(phase_ms["import_main"] + phase_ms["build_application"], 1)
+    module_ms = sorted(
+        ((name, round(statistics.median(values) * 1000, 1)) for name, values in modules.items()),
+        key=lambda item: -item[1]
+    )
+    return {"runs": len(runs), "phases_ms": phase_ms, "modules_ms": dict(module_ms[:top])}
+
+
+def print_report(summary: dict) -> None:
+    phases = summary["phases_ms"]
+    print(f"Startup, median of {summary['runs']} fresh interpreters:")
+    print(f"  {'import main':<32} {phases['import_main']:>9.1f} ms")
+    print(f"  {'build Application':<32} {phases['build_application']:>9.1f} ms")
+    print(f"  {'ready to poll':<32} {phases['ready_to_poll']:>9.1f} ms")
+    print(f"  {'deferred imports loaded':<32} {phases['deferred_imports_done']:>9.1f} ms")
+    print("\nSlowest imports (cumulative, ms):")
+    for name, ms in summary["modules_ms"].items():
+        print(f"  {name:<40} {ms:>9.1f}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure import and initialization time up to the first poll.")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="Fresh interpreters to start.")
+    parser.add_argument("--top", type=int, default=20, help="How many modules to list.")
+    parser.add_argument("--json", dest="json_path", help="Also write the summary to this JSON file.")
+    return parser.parse_args(argv)
+
+
+def cli(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    summary = summarize([run_probe() for _ in range(args.runs)], args.top)
+    print_report(summary)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+from aiohttp import web
+
+UPSTREAMS = (
+    "tme",
+    "tonnel",
+    "portals_collections",
+    "portals_search",
+    "mrkt_auth",
+    "mrkt_saling",
+    "tonapi",
+    "nobitex",
+)
+
+MODELS = ["Cozy Galaxy", "Ninja Mike", "Gold Rush", "Midnight Blue", "Sketchy", "Pumpkin"]
+BACKDROPS = ["Black", "Onyx Black", "Electric Purple", "Mint Green", "Sapphire"]
+SYMBOLS = ["Star", "Heart", "Crown", "Bolt"]
+
+
+class UpstreamProfile(NamedTuple):
+    latency_ms: float = 20.0
+    jitter: float = 0.3
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+
+
+class StubConfig(NamedTuple):
+    profiles: Dict[str, UpstreamProfile]
+    no_listing_rate: float = 0.1
+    seed: int = 1
+
+
+def gift_attributes(slug: str) -> Optional[dict]:
+    if slug.lower().startswith("missing"):
+        return None
+    match = re.match(r"^([A-Za-z]+)-(\d+)$", slug)
+    name, number = (match.group(1), match.group(2)) if match else (slug, "1")
+    collection = re.sub(r"(?<!^)(?=[A-Z])", " ", name)
+    h = zlib.crc32(slug.encode())
+    return {
+        "title": f"{collection} #{number}",
+        "collection": collection,
+        "model": MODELS[h % len(MODELS)],
+        "model_percent": f"{(h % 30) / 10 + 0.1:.1f}%",
+        "backdrop": BACKDROPS[(h >> 8) % len(BACKDROPS)],
+        "backdrop_percent": f"{(h >> 8) % 20 / 10 + 0.2:.1f}%",
+        "symbol": SYMBOLS[(h >> 16) % len(SYMBOLS)],
+        "symbol_percent": f"{(h >> 16) % 10 / 10 + 0.1:.1f}%",
+    }
+
+
+def render_gift_page(slug: str) -> str:
+    attributes = gift_attributes(slug)
+    filler = '<div class="tgme_page_additional">' + "Telegram gift page filler. " * 1500 + "</div>"
+    if attributes is None:
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8">'
+            '<meta property="og:title" content="Telegram: Contact @nft"></head>'
+            f'<body><div class="tgme_page">{filler}</div></body></html>'
+        )
+    rows = [
+        '<tr><th>Owner</th><td><a href="https://t.me/someone"><span class="tgme_gift_owner_photo"></span>Some Owner</a></td></tr>',
+        f'<tr><th>Model</th><td>{attributes["model"]} <mark>{attributes["model_percent"]}</mark></td></tr>',
+        f'<tr><th>Backdrop</th><td>{attributes["backdrop"]} <mark>{attributes["backdrop_percent"]}</mark></td></tr>',
+        f'<tr><th>Symbol</th><td>{attributes["symbol"]} <mark>{attributes["symbol_percent"]}</mark></td></tr>',
+        '<tr><th>Quantity</th><td>12 345/50 000 issued</td></tr>',
+    ]
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<meta property="og:title" content="{attributes["title"]}">'
+        '<meta property="og:image" content="https://cdn.example/gift.jpg"></head>'
+        '<body><div class="tgme_page"><div class="tgme_gift_preview"></div>'
+        f'<table class="tgme_gift_table">{"".join(rows)}</table>'
+        f'{filler}<script>var pageData = {{}};</script></div></body></html>'
+    )
+
+
+class StubServer:
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config
+        self.host = host
+        self.port = port
+        self.calls: Counter = Counter()
+        self._random = random.Random(config.seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def reset_counts(self) -> None:
+        self.calls.clear()
+
+    async def _behave(self, upstream: str) -> Optional[web.Response]:
+        self.calls[upstream] += 1
+        profile = self.config.profiles.get(upstream, UpstreamProfile())
+        delay = profile.latency_ms * self._random.lognormvariate(0, profile.jitter) if profile.jitter else profile.latency_ms
+        await asyncio.sleep(delay / 1000)
+        roll = self._random.random()
+        if roll < profile.rate_limit_rate:
+            self.calls[f"{upstream}_429"] += 1
+            return web.json_response({"error": "Too Many Requests"}, status=429)
+        if roll < profile.rate_limit_rate + profile.error_rate:
+            self.calls[f"{upstream}_5xx"] += 1
+            return web.json_response({"error": "Internal Server Error"}, status=502)
+        return None
+
+    def _has_listing(self, *key: str) -> bool:
+        return (zlib.crc32("|".join(key).encode()) % 1000) / 1000 >= self.config.no_listing_rate
+
+    def _price(self, *key: str) -> float:
+        return round(5 + zlib.crc32("|".join(key).encode()) % 5000 / 100, 2)
+
+    async def tme_page(self, request: web.Request) -> web.StreamResponse:
+        if failure := await self._behave("tme"):
+            return failure
+        return web.Response(text=render_gift_page(request.match_info["slug"]), content_type="text/html")
+
+    async def tonnel_page_gifts(self, request: web.Request) -> web.Response:
+        if failure := await self._behave("tonnel"):
+            return failure
+        payload = await request.json()
+        query = json.loads(payload.get("filter", "{}"))
+        backdrop = ",".join(query.get("backdrop", {}).get("$in", []))
+        key = (query.get("gift_name", ""), query.get("model", ""), backdrop)
+        if not self._has_listing(*key[:2]) or (backdrop and not self._has_listing(*key)):
+            return web.json_response([])
+        base = self._price(*key)
+        return web.json_response([{"gift_id": i, "price": round(base + i, 2)} for i in range(5)])
+
+    async def portals_collections(self, request: web.Request) -> web.Response:
+        if failure := await self._behave("portals_collections"):
+            return failure
+        search = request.query.get("search", "")
+        if search.lower().startswith("unknown"):
+            return web.json_response({"collections": []})
+        return web.json_response({"collections": [{"id": f"col-{zlib.crc32(search.encode())}", "name": search}]})
+
+    async def portals_search(self, request: web.Request) -> web.Response:
+        if failure := await self._behave("portals_search"):
+            return failure
+        key = (request.query.get("collection_ids", ""), request.query.get("filter_by_models", ""))
+        backdrop = request.query.get("filter_by_backdrops", "")
+        if not self._has_listing(*key) or (backdrop and not self._has_listing(*key, backdrop)):
+            return web.json_response({"results": []})
+        return web.json_response({"results": [{"price": str(self._price(*key, backdrop))}]})
+
+    async def mrkt_auth(self, request: web.Request) -> web.Response:
+        if failure := await self._behave("mrkt_auth"):
+            return failure
+        return web.json_response({"token": "stub-token"})
+
+    async def mrkt_saling(self, request: web.Request) -> web.Response:
+        if failure := await self._behave("mrkt_saling"):
+            return failure
+        payload = await request.json()
+        key = (",".join(payload.get("collectionNames", [])), ",".join(payload.get("modelNames", [])))
+        backdrop = ",".join(payload.get("backdropNames", []))
+        if not self._has_listing(*key) or (backdrop and not self._has_listing(*key, backdrop)):
+            return web.json_response({"gifts": []})
+        return web.json_response({"gifts": [{"salePrice": int(self._price(*key, backdrop) * 1_000_000_000)}]})
+
+    async def tonapi_rates(self, request: web.Request) -> web.Response:
+        if failure := await self._behave("tonapi"):
+            return failure
+        return web.json_response({"rates": {"TON": {"prices": {"USD": 3.12}}}})
+
+    async def nobitex_stats(self, request: web.Request) -> web.Response:
+        if failure := await self._behave("nobitex"):
+            return failure
+        return web.json_response({"stats": {"usdt-rls": {"latest": "1050000"}}})
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/tme/nft/{slug}", self.tme_page)
+        app.router.add_post("/tonnel/api/pageGifts", self.tonnel_page_gifts)
+        app.router.add_get("/portals/api/collections", self.portals_collections)
+        app.router.add_get("/portals/api/nfts/search", self.portals_search)
+        app.router.add_post("/mrkt/api/v1/auth", self.mrkt_auth)
+        app.router.add_post("/mrkt/api/v1/gifts/saling", self.mrkt_saling)
+        app.router.add_get("/tonapi/v2/rates", self.tonapi_rates)
+        app.router.add_get("/nobitex/market/stats", self.nobitex_stats)
+        return app
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class FakeInitDataProvider:
+    def __init__(self, latency_ms: float = 150.0, failure_rate: float = 0.0, seed: int = 1) -> None:
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+
+    async def __call__(self, session_name: str, bot_username: str, bot_short_name: str, platform: str = "android") -> Optional[str]:
+        self.calls[session_name] += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        if self._random.random() < self.failure_rate:
+            return None
+        return f"query_id=stub&user=%7B%22id%22%3A1%7D&auth_date=0&hash={session_name}"
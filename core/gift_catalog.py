@@ -0,0 +1,283 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from markets.portals_fetcher import get_portals_catalog
+from utils.config import CATALOG_PATH, CATALOG_REFRESH_INTERVAL, CATALOG_SAVE_INTERVAL
+from .gift_parser import GiftDetails
+
+log = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 5
+MIN_SUGGESTION_SCORE = 0.25
+REFRESH_RETRY_SECONDS = 600
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(re.sub(r"[^\w]+", " ", re.sub(r"['’]", "", name.lower())).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "names")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.names: Set[str] = set()
+
+
+class NameIndex:
+    """Prefix trie over every word suffix of a name, plus a trigram index for typo suggestions.
+
+    "pepe" and "plush p" both reach "Plush Pepe"; a miss such as "plsh pepe" falls back to
+    trigram overlap to suggest close names.
+    """
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+        self._names: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(self._names.values())
+
+    def add(self, name: str) -> None:
+        key = normalize_name(name)
+        if not key or key in self._names:
+            return
+        self._names[key] = name
+
+        words = key.split(" ")
+        for i in range(len(words)):
+            node = self._root
+            for char in " ".join(words[i:]):
+                node = node.children.setdefault(char, _TrieNode())
+                node.names.add(name)
+
+        for gram in trigrams(key):
+            self._grams[gram].add(name)
+
+    def get(self, query: str) -> Optional[str]:
+        return self._names.get(normalize_name(query))
+
+    def prefix_matches(self, query: str) -> List[str]:
+        node = self._root
+        for char in normalize_name(query):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return sorted(node.names, key=lambda name: (len(name), name))
+
+    def suggest(self, query: str, limit: int = MAX_SUGGESTIONS) -> List[str]:
+        query_grams = trigrams(normalize_name(query))
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for name in self._grams.get(gram, ()):
+                shared[name] += 1
+        scores = {
+            name: count / len(query_grams | trigrams(normalize_name(name)))
+            for name, count in shared.items()
+        }
+        ranked = sorted((name for name, score in scores.items() if score >= MIN_SUGGESTION_SCORE),
+                        key=lambda name: (-scores[name], name))
+        return ranked[:limit]
+
+    def match(self, query: str) -> "NameMatch":
+        exact = self.get(query)
+        if exact:
+            return NameMatch(exact, [])
+        matches = self.prefix_matches(query)
+        if len(matches) == 1:
+            return NameMatch(matches[0], [])
+        return NameMatch(None, matches[:MAX_SUGGESTIONS] or self.suggest(query))
+
+
+class NameMatch(NamedTuple):
+    name: Optional[str]
+    suggestions: List[str]
+
+
+class CatalogLookup(NamedTuple):
+    gift_details: Optional[GiftDetails]
+    field: Optional[str] = None
+    query: Optional[str] = None
+    suggestions: List[str] = []
+
+
+class GiftCatalog:
+    """Collections -> models -> rarity, plus backdrop rarities, for pricing gifts by name.
+
+    Filled from Portals' filter endpoints on a timer and from every t.me page the bot parses,
+    which is also where model rarity percentages come from. Kept on disk between restarts.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._models: Dict[str, Dict[str, Optional[str]]] = {}
+        self._backdrops: Dict[str, Optional[str]] = {}
+        self._collection_index = NameIndex()
+        self._model_indexes: Dict[str, NameIndex] = {}
+        self._backdrop_index = NameIndex()
+        self._dirty = False
+        self._refreshed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._refreshed_at = data.get("refreshed_at", 0.0)
+            for collection, models in data.get("collections", {}).items():
+                for model, percent in models.items():
+                    self._add_model(collection, model, percent)
+            for backdrop, percent in data.get("backdrops", {}).items():
+                self._add_backdrop(backdrop, percent)
+            log.info("Loaded %d gift collections from %s.", len(self._models), self._path)
+        except Exception as e:
+            log.error("Failed to load gift catalog from %s: %s", self._path, e)
+
+    def _snapshot(self) -> dict:
+        self._dirty = False
+        return {
+            "refreshed_at": self._refreshed_at,
+            "collections": {collection: dict(models) for collection, models in self._models.items()},
+            "backdrops": dict(self._backdrops),
+        }
+
+    def _save(self, data: dict) -> None:
+        tmp_path = f"{self._path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path)
+        except Exception as e:
+            log.error("Failed to save gift catalog to %s: %s", self._path, e)
+
+    def _add_model(self, collection: str, model: str, percent: Optional[str]) -> bool:
+        models = self._models.get(collection)
+        if models is None:
+            models = self._models[collection] = {}
+            self._collection_index.add(collection)
+            self._model_indexes[collection] = NameIndex()
+        if model in models and (percent is None or models[model] == percent):
+            return False
+        if model not in models:
+            self._model_indexes[collection].add(model)
+        if percent is not None or model not in models:
+            models[model] = percent
+        return True
+
+    def _add_backdrop(self, backdrop: str, percent: Optional[str]) -> bool:
+        if backdrop in self._backdrops and (percent is None or self._backdrops[backdrop] == percent):
+            return False
+        if backdrop not in self._backdrops:
+            self._backdrop_index.add(backdrop)
+        if percent is not None or backdrop not in self._backdrops:
+            self._backdrops[backdrop] = percent
+        return True
+
+    def learn(self, gift_details: GiftDetails) -> None:
+        collection = gift_details.get("gift_name_clean")
+        model = gift_details.get("model_name")
+        if not collection or not model:
+            return
+        changed = self._add_model(collection, model, gift_details.get("model_percent"))
+        backdrop = gift_details.get("backdrop_name")
+        if backdrop:
+            changed = self._add_backdrop(backdrop, gift_details.get("backdrop_percent")) or changed
+        self._dirty = self._dirty or changed
+
+    def resolve(self, query: str) -> CatalogLookup:
+        parts = [part.strip() for part in query.split(",")]
+        if len(parts) < 2 or len(parts) > 3 or not all(parts):
+            return CatalogLookup(None)
+
+        collection = self._collection_index.match(parts[0])
+        if collection.name is None:
+            return CatalogLookup(None, "collection", parts[0], collection.suggestions)
+
+        model = self._model_indexes[collection.name].match(parts[1])
+        if model.name is None:
+            return CatalogLookup(None, "model", parts[1], model.suggestions)
+
+        backdrop_name = backdrop_percent = None
+        if len(parts) == 3:
+            backdrop = self._backdrop_index.match(parts[2])
+            if backdrop.name is None:
+                return CatalogLookup(None, "backdrop", parts[2], backdrop.suggestions)
+            backdrop_name, backdrop_percent = backdrop.name, self._backdrops[backdrop.name]
+
+        return CatalogLookup({
+            "title": collection.name,
+            "gift_name_clean": collection.name,
+            "model_name": model.name,
+            "model_percent": self._models[collection.name][model.name],
+            "backdrop_name": backdrop_name,
+            "backdrop_percent": backdrop_percent,
+            "symbol_name": None,
+            "symbol_percent": None,
+        })
+
+    async def refresh(self) -> bool:
+        catalog = await get_portals_catalog()
+        if not catalog:
+            return False
+        for collection, models in catalog["collections"].items():
+            for model in models:
+                self._add_model(collection, model, None)
+        for backdrop, percent in catalog["backdrops"].items():
+            self._add_backdrop(backdrop, percent)
+        self._refreshed_at = time.time()
+        self._dirty = True
+        log.info("Gift catalog refreshed: %d collections.", len(self._models))
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._dirty:
+            self._save(self._snapshot())
+
+    async def _run(self) -> None:
+        next_refresh = self._refreshed_at + CATALOG_REFRESH_INTERVAL
+        while True:
+            if time.time() >= next_refresh:
+                try:
+                    refreshed = await self.refresh()
+                except Exception as e:
+                    log.error("Gift catalog refresh failed: %s", e, exc_info=True)
+                    refreshed = False
+                next_refresh = time.time() + (CATALOG_REFRESH_INTERVAL if refreshed else REFRESH_RETRY_SECONDS)
+            if self._dirty:
+                await asyncio.to_thread(self._save, self._snapshot())
+            await asyncio.sleep(CATALOG_SAVE_INTERVAL)
+
+
+gift_catalog = GiftCatalog(CATALOG_PATH)
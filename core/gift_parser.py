@@ -1,55 +1,212 @@
-from typing import Dict, Optional
-from bs4 import BeautifulSoup
+from typing import AsyncIterable, Dict, List, Optional
+from html.parser import HTMLParser
+import asyncio
+import codecs
 import re
 import logging
+import time
+
+from utils.metrics import observe_stage
 
 log = logging.getLogger(__name__)
 
 GiftDetails = Dict[str, Optional[str]]
 
+PARSE_CHUNK_SIZE = 8192
 
-def parse_gift_page(html: str, link: str) -> GiftDetails:
-    soup = BeautifulSoup(html, "html.parser")
-    meta_title = soup.find("meta", property="og:title")
-    title = meta_title["content"].strip() if meta_title else link
-    gift_name_match = re.match(r"^(.*?)(?:\s*(?:#|-)\d+)?$", title)
-    gift_name_clean = gift_name_match.group(1).strip() if gift_name_match else title
-
-    details: GiftDetails = {
-        "title": title,
-        "gift_name_clean": gift_name_clean,
-        "model_name": None, 
-        "model_percent": None, 
-        "backdrop_name": None,
-        "backdrop_percent": None, 
-        "symbol_name": None, 
-        "symbol_percent": None
-    }
-
-    table = soup.find("table", class_="tgme_gift_table")
-    rows = table.find_all("tr") if table else []
-
-    for row in rows:
-        key = row.find("th").get_text(strip=True).lower() if row.find("th") else ""
-        td = row.find("td")
-        if key and td:
-            mark = td.find("mark")
-            percent = mark.get_text(strip=True) if mark else None
-            if mark: 
-                mark.extract()
-            value = td.get_text(strip=True)
-            if key == "model": 
+
+class GiftPageParser(HTMLParser):
+    """Incremental t.me/nft page parser that only tracks og:title and the gift table.
+
+    Text is collected the same way BeautifulSoup's get_text(strip=True) does it, so the
+    resulting details match the previous full-tree parse. Once the gift table closes,
+    `done` is set and the remaining markup can be skipped.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.rows: List[tuple] = []
+        self.done = False
+
+        self._table_depth = 0
+        self._data: List[str] = []
+        self._row: Optional[dict] = None
+        self._cell: Optional[str] = None
+        self._mark_depth = 0
+
+    def _flush(self) -> None:
+        if not self._data:
+            return
+        text = "".join(self._data).strip()
+        self._data.clear()
+        if not text or self._row is None or self._cell is None:
+            return
+        if self._cell == "th":
+            self._row["th"].append(text)
+        elif self._mark_depth and self._row["mark"] is None:
+            self._row["mark_parts"].append(text)
+        else:
+            self._row["td"].append(text)
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if self.done:
+            return
+        self._flush()
+
+        if tag == "meta" and self.title is None:
+            attributes = dict(attrs)
+            if attributes.get("property") == "og:title" and attributes.get("content") is not None:
+                self.title = attributes["content"].strip()
+            return
+
+        if tag == "table":
+            classes = (dict(attrs).get("class") or "").split()
+            if self._table_depth or "tgme_gift_table" in classes:
+                self._table_depth += 1
+            return
+
+        if not self._table_depth:
+            return
+
+        if tag == "tr" and (self._row is None or self._table_depth == 1):
+            # </tr> is optional in HTML: a new row closes the previous one.
+            self._finish_row()
+            self._row = {"th": [], "td": [], "mark": None, "mark_parts": [], "seen": set()}
+        elif self._row is not None:
+            if tag in ("th", "td") and self._cell is None and tag not in self._row["seen"]:
+                self._row["seen"].add(tag)
+                self._cell = tag
+            elif tag == "mark" and self._cell == "td" and self._row["mark"] is None:
+                self._mark_depth += 1
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.done or not self._table_depth:
+            return
+        self._flush()
+
+        if tag == "table":
+            self._table_depth -= 1
+            if not self._table_depth:
+                self._finish_row()
+                self.done = True
+        elif self._row is None:
+            return
+        elif tag == "mark" and self._mark_depth:
+            self._mark_depth -= 1
+            if not self._mark_depth:
+                self._row["mark"] = "".join(self._row["mark_parts"])
+        elif tag == self._cell:
+            self._finish_cell()
+        elif tag == "tr":
+            self._finish_row()
+
+    def _finish_cell(self) -> None:
+        if self._mark_depth and self._row["mark"] is None:
+            self._row["mark"] = "".join(self._row["mark_parts"])
+        self._cell = None
+        self._mark_depth = 0
+
+    def _finish_row(self) -> None:
+        if self._row is None:
+            return
+        if self._cell is not None:
+            self._finish_cell()
+        row = self._row
+        self._row = None
+        if row["th"]:
+            self.rows.append(("".join(row["th"]).lower(), "".join(row["td"]) if "td" in row["seen"] else None, row["mark"]))
+
+    def close(self) -> None:
+        """Flush the input and keep a row left open by a truncated page."""
+        super().close()
+        if self._table_depth and not self.done:
+            self._flush()
+            self._finish_row()
+
+    def handle_comment(self, data: str) -> None:
+        if self._table_depth and not self.done:
+            self._flush()
+
+    def handle_data(self, data: str) -> None:
+        if self._table_depth and not self.done:
+            self._data.append(data)
+
+    def details(self, link: str) -> GiftDetails:
+        title = self.title if self.title is not None else link
+        gift_name_match = re.match(r"^(.*?)(?:\s*(?:#|-)\d+)?$", title)
+        gift_name_clean = gift_name_match.group(1).strip() if gift_name_match else title
+
+        details: GiftDetails = {
+            "title": title,
+            "gift_name_clean": gift_name_clean,
+            "model_name": None,
+            "model_percent": None,
+            "backdrop_name": None,
+            "backdrop_percent": None,
+            "symbol_name": None,
+            "symbol_percent": None
+        }
+
+        for key, value, percent in self.rows:
+            if value is None:
+                continue
+            if key == "model":
                 details["model_name"], details["model_percent"] = value, percent
-            elif key == "backdrop": 
+            elif key == "backdrop":
                 details["backdrop_name"], details["backdrop_percent"] = value, percent
-            elif key == "symbol": 
+            elif key == "symbol":
                 details["symbol_name"], details["symbol_percent"] = value, percent
 
-    return details
+        return details
+
+
+def parse_gift_page(html: str, link: str) -> GiftDetails:
+    parser = GiftPageParser()
+    for start in range(0, len(html), PARSE_CHUNK_SIZE):
+        parser.feed(html[start:start + PARSE_CHUNK_SIZE])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.details(link)
+
+
+async def parse_gift_page_async(html: str, link: str) -> GiftDetails:
+    return await asyncio.to_thread(parse_gift_page, html, link)
+
+
+async def parse_gift_stream(chunks: AsyncIterable[bytes], link: str) -> GiftDetails:
+    parser = GiftPageParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parse_seconds = 0.0
+
+    def feed(text: str) -> float:
+        started = time.perf_counter()
+        parser.feed(text)
+        return time.perf_counter() - started
+
+    async for chunk in chunks:
+        parse_seconds += await asyncio.to_thread(feed, decoder.decode(chunk))
+        if parser.done:
+            log.debug("Gift table closed, stopped reading %s early.", link)
+            break
+    else:
+        parse_seconds += feed(decoder.decode(b"", final=True))
+        started = time.perf_counter()
+        parser.close()
+        parse_seconds += time.perf_counter() - started
+
+    observe_stage("parse", parse_seconds, outcome="ok" if parser.done else "no_table")
+    return parser.details(link)
 
 
-def format_gift_details(gift_details: GiftDetails, link: str) -> str:
-    output = f'🎁 <a href="{link}">{gift_details["title"]}</a>\n\n'
+def format_gift_details(gift_details: GiftDetails, link: Optional[str]) -> str:
+    title = f'<a href="{link}">{gift_details["title"]}</a>' if link else gift_details["title"]
+    output = f'🎁 {title}\n\n'
     
     if gift_details["model_name"]:
         output += f'- Model: <code>{gift_details["model_name"]}</code> ({gift_details["model_percent"]})\n'
@@ -1,14 +1,22 @@
 import asyncio
+import itertools
 import logging
-from typing import Dict, Tuple, Optional, Any
-from markets.portals_fetcher import get_portal_prices
-from markets.mrkt_fetcher import get_mrkt_prices
-from markets.tonnel_fetcher import get_tonnel_prices
+import time
+from contextlib import aclosing
+from typing import Dict, List, Tuple, Optional, Any
+from markets.listings import Listing
+from markets.portals_fetcher import get_portal_prices, iter_portals_listings
+from markets.mrkt_fetcher import get_mrkt_prices, iter_mrkt_listings
+from markets.tonnel_fetcher import get_tonnel_prices, iter_tonnel_listings
+from utils.cache import TTLCache, negative_cache
+from utils.config import PRICE_CACHE_TTL, PRICE_CACHE_SIZE
+from utils.metrics import count_cache_lookup, observe_stage, track_stage
+from utils.rate_limiter import RateLimiter
 from .gift_parser import GiftDetails
 
 log = logging.getLogger(__name__)
 
-from typing import Dict, Tuple, Optional, Any, NamedTuple
+from typing import Dict, Tuple, Optional, Any, NamedTuple, Sequence
 
 class MarketResult(NamedTuple):
     price_simple: Optional[float]
@@ -18,8 +26,69 @@ class MarketResult(NamedTuple):
 
 AllMarketPrices = Dict[str, MarketResult]
 
+TONNEL_PRICE_ADJUSTMENT = 1.06
 
-async def fetch_all_market_prices(gift_details: GiftDetails) -> AllMarketPrices:
+MARKET_FETCHERS = {
+    "tonnel": get_tonnel_prices,
+    "portals": get_portal_prices,
+    "mrkt": get_mrkt_prices,
+}
+ALL_MARKETS = tuple(MARKET_FETCHERS)
+
+LISTING_ITERATORS = {
+    "tonnel": iter_tonnel_listings,
+    "portals": iter_portals_listings,
+    "mrkt": iter_mrkt_listings,
+}
+
+
+class PriceSnapshot(NamedTuple):
+    version: int
+    fetched_at: float
+    prices: AllMarketPrices
+    complete: bool
+
+
+market_rate_limiters: Dict[str, RateLimiter] = {}
+
+_snapshot_versions = itertools.count(1)
+_inflight_refreshes: Dict[tuple, "asyncio.Future[PriceSnapshot]"] = {}
+price_snapshots = TTLCache(maxsize=PRICE_CACHE_SIZE)
+
+
+def get_market_key(gift_details: GiftDetails) -> tuple:
+    return (
+        gift_details["gift_name_clean"],
+        gift_details["model_name"],
+        gift_details["model_percent"],
+        gift_details["backdrop_name"],
+        gift_details["backdrop_percent"],
+    )
+
+
+async def fetch_market_prices(market: str, fetcher, collection_name: str, model_name: str, backdrop_name: str) -> Any:
+    listing_key = ("no_listing", market, collection_name, model_name)
+    if listing_key in negative_cache:
+        log.debug("Skipping %s lookup for %s / %s: no listings cached.", market, collection_name, model_name)
+        observe_stage("market_query", 0.0, market, "cached_no_listing")
+        return None, None
+
+    limiter = market_rate_limiters.get(market)
+    if limiter is not None:
+        await limiter.acquire()
+
+    with track_stage("market_query", market) as stage:
+        result = await fetcher(collection_name, model_name, backdrop_name)
+        if isinstance(result, (tuple, list)):
+            if "ERROR" in result:
+                stage.outcome = "error"
+            elif result[0] is None:
+                stage.outcome = "no_listing"
+                negative_cache.set(listing_key)
+    return result
+
+
+def get_market_queries(gift_details: GiftDetails) -> Dict[str, Tuple[str, str, str]]:
     gift_name_clean = gift_details["gift_name_clean"]
     model_name = gift_details["model_name"]
     backdrop_name = gift_details["backdrop_name"]
@@ -29,34 +98,127 @@ async def fetch_all_market_prices(gift_details: GiftDetails) -> AllMarketPrices:
     model_clean = model_name.strip() if model_name else ""
     backdrop_clean = backdrop_name.strip() if backdrop_name else ""
 
-    tonnel_task = get_tonnel_prices(gift_name_clean, model_full, backdrop_full)
-    portals_task = get_portal_prices(gift_name_clean, model_clean, backdrop_clean)
-    mrkt_task = get_mrkt_prices(gift_name_clean, model_clean, backdrop_clean)
+    return {
+        "tonnel": (gift_name_clean, model_full, backdrop_full),
+        "portals": (gift_name_clean, model_clean, backdrop_clean),
+        "mrkt": (gift_name_clean, model_clean, backdrop_clean),
+    }
+
+
+def to_market_result(result: Any) -> MarketResult:
+    if isinstance(result, Exception):
+        log.error("Market fetcher raised an unhandled exception: %s", result)
+        return MarketResult(None, True, None, True)
+
+    price_simple, price_detailed = result
+    error_simple = price_simple == "ERROR"
+    error_detailed = price_detailed == "ERROR"
+    return MarketResult(
+        price_simple if not error_simple else None, 
+        error_simple, 
+        price_detailed if not error_detailed else None, 
+        error_detailed
+    )
+
+
+def to_ton(market: str, price: float) -> float:
+    if market == "mrkt":
+        price = price / 1_000_000_000
+    elif market == "tonnel":
+        price = price * TONNEL_PRICE_ADJUSTMENT
+    return round(price, 4)
+
+
+async def fetch_all_market_prices(gift_details: GiftDetails, markets: Sequence[str] = ALL_MARKETS) -> AllMarketPrices:
+    queries = get_market_queries(gift_details)
 
     results = await asyncio.gather(
-        tonnel_task,
-        portals_task,
-        mrkt_task,
+        *(fetch_market_prices(market, MARKET_FETCHERS[market], *queries[market]) for market in markets),
         return_exceptions=True
     )
 
-    def process_result(result: Any) -> MarketResult:
-        if isinstance(result, Exception):
-            log.error("Market fetcher raised an unhandled exception: %s", result)
-            return MarketResult(None, True, None, True)
-
-        price_simple, price_detailed = result
-        error_simple = price_simple == "ERROR"
-        error_detailed = price_detailed == "ERROR"
-        return MarketResult(
-            price_simple if not error_simple else None, 
-            error_simple, 
-            price_detailed if not error_detailed else None, 
-            error_detailed
-        )
-
     return {
-        "tonnel": process_result(results[0]),
-        "portals": process_result(results[1]),
-        "mrkt": process_result(results[2]),
+        market: to_market_result(result)
+        for market, result in zip(markets, results)
     }
+
+
+async def refresh_price_snapshot(key: tuple, gift_details: GiftDetails, markets: Sequence[str]) -> PriceSnapshot:
+    snapshot = price_snapshots.get(key)
+    with track_stage("markets"):
+        prices = await fetch_all_market_prices(gift_details, markets)
+    complete = not any(result.error_simple or result.error_detailed for result in prices.values())
+
+    if snapshot and snapshot.prices == prices:
+        version = snapshot.version
+    else:
+        version = next(_snapshot_versions)
+
+    new_snapshot = PriceSnapshot(version, time.monotonic(), prices, complete)
+    if complete:
+        price_snapshots.set(key, new_snapshot)
+    else:
+        price_snapshots.discard(key)
+    return new_snapshot
+
+
+async def get_price_snapshot(gift_details: GiftDetails, markets: Sequence[str] = ALL_MARKETS) -> PriceSnapshot:
+    key = (*get_market_key(gift_details), tuple(markets))
+    snapshot = price_snapshots.get(key)
+    fresh = bool(snapshot) and time.monotonic() - snapshot.fetched_at < PRICE_CACHE_TTL
+    count_cache_lookup("price_snapshot", fresh)
+    if fresh:
+        return snapshot
+
+    task = _inflight_refreshes.get(key)
+    if task is None:
+        task = asyncio.ensure_future(refresh_price_snapshot(key, gift_details, markets))
+        _inflight_refreshes[key] = task
+        task.add_done_callback(lambda _: _inflight_refreshes.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def get_order_book(
+    market: str,
+    collection_name: str,
+    model_name: Optional[str] = None,
+    backdrop_name: Optional[str] = None,
+    depth: int = 50,
+    max_ton: Optional[float] = None
+) -> List[Listing]:
+    """Cheapest `depth` listings, stopping early once prices pass `max_ton`."""
+    book: List[Listing] = []
+    with track_stage("listing_scan", market):
+        async with aclosing(LISTING_ITERATORS[market](collection_name, model_name, backdrop_name)) as listings:
+            async for listing in listings:
+                if max_ton is not None and to_ton(market, listing.price) > max_ton:
+                    break
+                book.append(listing)
+                if len(book) >= depth:
+                    break
+    return book
+
+
+async def get_model_floors(
+    market: str,
+    collection_name: str,
+    max_listings: int = 1000,
+    expected_models: Optional[int] = None
+) -> Dict[str, float]:
+    """Floor price in TON per model, from one cheapest-first scan of the collection.
+
+    Stops after `max_listings` listings, or as soon as `expected_models` models have a floor.
+    """
+    floors: Dict[str, float] = {}
+    scanned = 0
+    with track_stage("listing_scan", market):
+        async with aclosing(LISTING_ITERATORS[market](collection_name)) as listings:
+            async for listing in listings:
+                scanned += 1
+                if listing.model and listing.model not in floors:
+                    floors[listing.model] = to_ton(market, listing.price)
+                    if expected_models is not None and len(floors) >= expected_models:
+                        break
+                if scanned >= max_listings:
+                    break
+    return floors
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from utils.config import API_BATCH_CONCURRENCY, API_BATCH_MAX
+from .market_aggregator import get_market_key
+from .pricing import attributes_to_gift_details, normalize_link, price_gift_details, price_link
+
+log = logging.getLogger(__name__)
+
+LINK_PREFIXES = ("t.me/nft/", "http://t.me/nft/", "https://t.me/nft/")
+OPTIONAL_TEXT_FIELDS = ("backdrop", "model_percent", "backdrop_percent")
+
+
+def parse_batch_item(item: Any) -> Tuple[Optional[tuple], Any]:
+    if isinstance(item, str):
+        if not item.startswith(LINK_PREFIXES):
+            return None, "expected a t.me/nft link"
+        link = normalize_link(item)
+        return ("link", link), link
+
+    if isinstance(item, (list, tuple)) and 2 <= len(item) <= 3:
+        item = dict(zip(("collection", "model", "backdrop"), item))
+
+    if isinstance(item, dict) and isinstance(item.get("collection"), str) and isinstance(item.get("model"), str):
+        if not all(isinstance(item.get(field), (str, type(None))) for field in OPTIONAL_TEXT_FIELDS):
+            return None, f"{', '.join(OPTIONAL_TEXT_FIELDS)} must be strings or null"
+        gift_details = attributes_to_gift_details(
+            item["collection"],
+            item["model"],
+            item.get("backdrop") or None,
+            item.get("model_percent"),
+            item.get("backdrop_percent"),
+        )
+        return ("gift", get_market_key(gift_details)), gift_details
+
+    return None, "expected a link, [collection, model, backdrop] or an object with collection and model"
+
+
+async def run_job(job: Any) -> Dict[str, Any]:
+    if isinstance(job, str):
+        return await price_link(job)
+    return await price_gift_details(job)
+
+
+class PriceApiServer:
+    def __init__(self, host: str, port: int) -> None:
+        self._host = host
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_price(self, request: web.Request) -> web.Response:
+        link = request.query.get("link", "")
+        if not link.startswith(LINK_PREFIXES):
+            return web.json_response({"error": "link must be a t.me/nft link"}, status=400)
+        try:
+            return web.json_response(await price_link(link))
+        except Exception as e:
+            log.error("Error pricing %s via API: %s", link, e, exc_info=True)
+            return web.json_response({"link": link, "status": "error"}, status=500)
+
+    async def _handle_batch(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({"error": "body must be JSON"}, status=400)
+
+        items = body.get("items") if isinstance(body, dict) else body
+        if not isinstance(items, list):
+            return web.json_response({"error": "expected a JSON list or {\"items\": [...]}"}, status=400)
+        if len(items) > API_BATCH_MAX:
+            return web.json_response({"error": f"at most {API_BATCH_MAX} items per batch"}, status=413)
+
+        jobs: Dict[tuple, Any] = {}
+        indexes: Dict[tuple, List[int]] = {}
+        invalid: List[Dict[str, Any]] = []
+        for index, item in enumerate(items):
+            key, job = parse_batch_item(item)
+            if key is None:
+                invalid.append({"indexes": [index], "status": "invalid", "error": job})
+                continue
+            jobs.setdefault(key, job)
+            indexes.setdefault(key, []).append(index)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+
+        async def write(line: Dict[str, Any]) -> None:
+            await response.write(json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        for line in invalid:
+            await write(line)
+
+        semaphore = asyncio.Semaphore(API_BATCH_CONCURRENCY)
+
+        async def price(key: tuple) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await run_job(jobs[key])
+                except Exception as e:
+                    log.error("Error pricing batch item %s: %s", key, e, exc_info=True)
+                    result = {"status": "error"}
+            return {"indexes": indexes[key], **result}
+
+        tasks = [asyncio.ensure_future(price(key)) for key in jobs]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                await write(await finished)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        await response.write_eof()
+        return response
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/price", self._handle_price)
+        app.router.add_post("/price/batch", self._handle_batch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        log.info("Price API listening on http://%s:%d", self._host, self._port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
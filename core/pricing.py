@@ -0,0 +1,159 @@
+import logging
+import re
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from utils.cache import negative_cache
+from utils.converter import get_rates, ton_to_usd
+from utils.metrics import count_cache_lookup, track_stage
+from utils.session_manager import session_manager
+from .gift_catalog import gift_catalog
+from .gift_parser import GiftDetails, parse_gift_stream
+from .market_aggregator import ALL_MARKETS, AllMarketPrices, get_price_snapshot, to_ton
+
+log = logging.getLogger(__name__)
+
+GIFT_OK = "ok"
+GIFT_NOT_FOUND = "not_found"
+GIFT_FETCH_FAILED = "fetch_failed"
+
+
+def normalize_link(link: str) -> str:
+    return link if link.startswith("http") else "https://" + link
+
+
+def extract_gift_link(text: str) -> Optional[str]:
+    match = re.search(r"(https?://)?t\.me/nft/[\w-]+", text)
+    return match.group(0) if match else None
+
+
+def get_gift_slug(link: str) -> str:
+    return link.rstrip("/").rsplit("/", 1)[-1].lower()
+
+
+async def fetch_gift_details(link: str) -> Optional[GiftDetails]:
+    session = await session_manager.get_session()
+    with track_stage("tme_fetch") as stage:
+        async with session.stream("GET", link, timeout=15) as link_resp:
+            if not link_resp.ok:
+                log.warning("Failed to fetch gift link %s. Status: %d", link, link_resp.status_code)
+                stage.outcome = f"http_{link_resp.status_code}"
+                return None
+
+            try:
+                return await parse_gift_stream(link_resp.aiter_content(), link)
+            finally:
+                if link_resp.quit_now is not None:
+                    link_resp.quit_now.set()
+
+
+def is_cached_not_found(link: str) -> bool:
+    cached_not_found = ("gift_slug", get_gift_slug(link)) in negative_cache
+    count_cache_lookup("gift_not_found", cached_not_found)
+    if cached_not_found:
+        log.info("Gift link %s is cached as not found.", link)
+    return cached_not_found
+
+
+async def fetch_gift(link: str) -> Tuple[str, Optional[GiftDetails]]:
+    """lookup_gift without the not-found cache check, for callers that already made it."""
+    gift_details = await fetch_gift_details(link)
+    if gift_details is None:
+        return GIFT_FETCH_FAILED, None
+
+    if not gift_details.get("model_name"):
+        log.info("No model details found for link %s. Assuming it's an invalid gift.", link)
+        negative_cache.set(("gift_slug", get_gift_slug(link)))
+        return GIFT_NOT_FOUND, None
+
+    gift_catalog.learn(gift_details)
+    return GIFT_OK, gift_details
+
+
+async def lookup_gift(link: str) -> Tuple[str, Optional[GiftDetails]]:
+    if is_cached_not_found(link):
+        return GIFT_NOT_FOUND, None
+    return await fetch_gift(link)
+
+
+def attributes_to_gift_details(
+    collection: str,
+    model: str,
+    backdrop: Optional[str] = None,
+    model_percent: Optional[str] = None,
+    backdrop_percent: Optional[str] = None
+) -> GiftDetails:
+    return {
+        "title": collection,
+        "gift_name_clean": collection,
+        "model_name": model,
+        "model_percent": model_percent,
+        "backdrop_name": backdrop,
+        "backdrop_percent": backdrop_percent,
+        "symbol_name": None,
+        "symbol_percent": None,
+    }
+
+
+def get_supported_markets(gift_details: GiftDetails) -> Sequence[str]:
+    # Tonnel filters on "Name (percent%)", so it cannot be queried without rarity percentages.
+    if gift_details["model_percent"] and (gift_details["backdrop_percent"] or not gift_details["backdrop_name"]):
+        return ALL_MARKETS
+    return tuple(market for market in ALL_MARKETS if market != "tonnel")
+
+
+def market_prices_to_dict(market_prices: AllMarketPrices, ton_to_usd_rate: Optional[float]) -> Dict[str, Any]:
+    def price_entry(market: str, price: Optional[float], error: bool) -> Dict[str, Any]:
+        if error:
+            return {"error": True}
+        if price is None:
+            return {"ton": None}
+        ton = to_ton(market, price)
+        entry: Dict[str, Any] = {"ton": ton}
+        if ton_to_usd_rate:
+            entry["usd"] = ton_to_usd(ton, ton_to_usd_rate)
+        return entry
+
+    return {
+        market: {
+            "model": price_entry(market, result.price_simple, result.error_simple),
+            "model_backdrop": price_entry(market, result.price_detailed, result.error_detailed),
+        }
+        for market, result in market_prices.items()
+    }
+
+
+def gift_details_to_dict(gift_details: GiftDetails) -> Dict[str, Any]:
+    return {
+        "title": gift_details["title"],
+        "collection": gift_details["gift_name_clean"],
+        "model": gift_details["model_name"],
+        "model_percent": gift_details["model_percent"],
+        "backdrop": gift_details["backdrop_name"],
+        "backdrop_percent": gift_details["backdrop_percent"],
+        "symbol": gift_details.get("symbol_name"),
+        "symbol_percent": gift_details.get("symbol_percent"),
+    }
+
+
+async def price_markets(gift_details: GiftDetails) -> Dict[str, Any]:
+    """Per-market prices, which depend only on get_market_key(gift_details), not on the gift's title or number."""
+    snapshot = await get_price_snapshot(gift_details, get_supported_markets(gift_details))
+    rates = await get_rates()
+    ton_to_usd_rate = rates["ton_to_usd"] if rates else None
+    return market_prices_to_dict(snapshot.prices, ton_to_usd_rate)
+
+
+async def price_gift_details(gift_details: GiftDetails) -> Dict[str, Any]:
+    return {
+        "status": GIFT_OK,
+        "gift": gift_details_to_dict(gift_details),
+        "prices": await price_markets(gift_details),
+    }
+
+
+async def price_link(link: str) -> Dict[str, Any]:
+    link = normalize_link(link)
+    status, gift_details = await lookup_gift(link)
+    if gift_details is None:
+        return {"link": link, "status": status}
+    return {"link": link, **await price_gift_details(gift_details)}
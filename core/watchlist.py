@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from utils.config import WATCHLIST_PATH, WATCH_INTERVAL, WATCH_MARKET_RATE_LIMIT
+from utils.rate_limiter import RateLimiter
+from .gift_parser import GiftDetails
+from .market_aggregator import MARKET_FETCHERS, fetch_market_prices, get_market_queries, to_market_result, to_ton
+
+log = logging.getLogger(__name__)
+
+WatchKey = Tuple[str, str, str, str]
+
+MARKET_NAMES = {"tonnel": "Tonnel", "portals": "Portals", "mrkt": "MRKT"}
+
+
+class Subscription(NamedTuple):
+    chat_id: int
+    user_id: int
+    link: str
+    title: str
+    gift_name: str
+    model_name: str
+    model_percent: Optional[str]
+    backdrop_name: Optional[str]
+    backdrop_percent: Optional[str]
+    with_backdrop: bool
+    target: float
+
+    def gift_details(self) -> GiftDetails:
+        return {
+            "gift_name_clean": self.gift_name,
+            "model_name": self.model_name,
+            "model_percent": self.model_percent,
+            "backdrop_name": self.backdrop_name if self.with_backdrop else None,
+            "backdrop_percent": self.backdrop_percent if self.with_backdrop else None,
+        }
+
+    def watch_keys(self) -> List[WatchKey]:
+        return [(market, *query) for market, query in get_market_queries(self.gift_details()).items()]
+
+
+class WatchlistStore:
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._subscriptions: List[Subscription] = []
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                self._subscriptions = [Subscription(**item) for item in json.load(f)]
+            log.info("Loaded %d watchlist subscriptions from %s.", len(self._subscriptions), self._path)
+        except Exception as e:
+            log.error("Failed to load watchlist from %s: %s", self._path, e)
+
+    def _save(self) -> None:
+        tmp_path = f"{self._path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([sub._asdict() for sub in self._subscriptions], f, ensure_ascii=False)
+            os.replace(tmp_path, self._path)
+        except Exception as e:
+            log.error("Failed to save watchlist to %s: %s", self._path, e)
+
+    def all(self) -> List[Subscription]:
+        return list(self._subscriptions)
+
+    def for_chat(self, chat_id: int, user_id: int) -> List[Subscription]:
+        return [sub for sub in self._subscriptions if sub.chat_id == chat_id and sub.user_id == user_id]
+
+    def add(self, subscription: Subscription) -> None:
+        self._subscriptions = [
+            sub for sub in self._subscriptions
+            if sub._replace(target=subscription.target) != subscription
+        ]
+        self._subscriptions.append(subscription)
+        self._save()
+
+    def remove(self, chat_id: int, user_id: int, link: Optional[str] = None) -> int:
+        kept = [
+            sub for sub in self._subscriptions
+            if not (sub.chat_id == chat_id and sub.user_id == user_id and (link is None or sub.link == link))
+        ]
+        removed = len(self._subscriptions) - len(kept)
+        if removed:
+            self._subscriptions = kept
+            self._save()
+        return removed
+
+
+Notifier = Callable[[int, str], Awaitable[None]]
+
+
+class WatchlistScheduler:
+    def __init__(self, store: WatchlistStore, notify: Notifier) -> None:
+        self._store = store
+        self._notify = notify
+        self._limiters = {market: RateLimiter(WATCH_MARKET_RATE_LIMIT) for market in MARKET_FETCHERS}
+        self._notified: Dict[Tuple[Subscription, str], float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                log.error("Watchlist poll failed: %s", e, exc_info=True)
+            await asyncio.sleep(max(0.0, WATCH_INTERVAL - (time.monotonic() - started)))
+
+    async def poll_once(self) -> None:
+        subscribers: Dict[WatchKey, List[Subscription]] = defaultdict(list)
+        for sub in self._store.all():
+            for key in sub.watch_keys():
+                subscribers[key].append(sub)
+
+        if not subscribers:
+            return
+
+        # Model-only alerts only need the model floor, which the with-backdrop query for the same model
+        # also returns, so they ride along instead of costing a query of their own.
+        detailed_keys = {key[:3]: key for key in subscribers if key[3]}
+        for key in [key for key in subscribers if not key[3] and key[:3] in detailed_keys]:
+            subscribers[detailed_keys[key[:3]]].extend(subscribers.pop(key))
+
+        keys_by_market: Dict[str, List[WatchKey]] = defaultdict(list)
+        for key in subscribers:
+            keys_by_market[key[0]].append(key)
+
+        log.info("Polling %d distinct watch keys for %d subscriptions.", len(subscribers), len(self._store.all()))
+
+        async def poll_market(market: str, keys: List[WatchKey]) -> None:
+            for key in keys:
+                await self._limiters[market].acquire()
+                result = to_market_result(await fetch_market_prices(market, MARKET_FETCHERS[market], *key[1:]))
+                await self._fan_out(key, result, subscribers[key])
+
+        await asyncio.gather(*(poll_market(market, keys) for market, keys in keys_by_market.items()))
+
+        active = set(self._store.all())
+        self._notified = {k: v for k, v in self._notified.items() if k[0] in active}
+
+    async def _fan_out(self, key: WatchKey, result, subs: List[Subscription]) -> None:
+        market = key[0]
+        for sub in subs:
+            error = result.error_detailed if sub.with_backdrop else result.error_simple
+            price = result.price_detailed if sub.with_backdrop else result.price_simple
+            if error:
+                continue
+
+            state_key = (sub, market)
+            ton_price = to_ton(market, price) if price is not None else None
+            if ton_price is None or ton_price > sub.target:
+                self._notified.pop(state_key, None)
+                continue
+
+            last_price = self._notified.get(state_key)
+            if last_price is not None and ton_price >= last_price:
+                continue
+
+            self._notified[state_key] = ton_price
+            label = "Model + Backdrop" if sub.with_backdrop else "Model"
+            text = (
+                f'🔔 <a href="{sub.link}">{sub.title}</a>\n'
+                f'{label} floor on {MARKET_NAMES[market]} is '
+                f'<code>{ton_price}</code> TON (target <code>{sub.target}</code> TON).'
+            )
+            try:
+                await self._notify(sub.chat_id, text)
+            except Exception as e:
+                log.warning("Failed to send watchlist alert to chat %s: %s", sub.chat_id, e)
+
+
+watchlist_store = WatchlistStore(WATCHLIST_PATH)
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Optional, Sequence
 import asyncio
-import re
+import html
 import logging
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -8,17 +8,31 @@ from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler
 
 from markets.client_manager import client_manager
 from utils.logger_setup import setup_logging
-from utils.converter import get_rates
-from utils.config import BOT_TOKEN, TONNEL_URL, PORTALS_URL, MRKT_URL, CHANNEL_NAME, CHANNEL_URL
+from utils.converter import get_rates, quantize_rate
+from utils.config import (
+    BOT_TOKEN, ADMIN_CHAT_ID, TONNEL_URL, PORTALS_URL, MRKT_URL, CHANNEL_NAME, CHANNEL_URL,
+    RESPONSE_CACHE_SIZE, WATCH_MAX_PER_USER, METRICS_HOST, METRICS_PORT, API_HOST, API_PORT
+)
 from utils.session_manager import session_manager
-from core.gift_parser import parse_gift_page, format_gift_details
+from utils.cache import TTLCache
+from utils.metrics import MetricsServer, count_cache_lookup, track_stage
+from utils.tracing import start_trace
+from utils.profiling import maybe_profile
+from utils.deferred_imports import preload_in_background
+from core.gift_parser import GiftDetails, format_gift_details
 from core.message_formatter import format_market_output
-from core.market_aggregator import fetch_all_market_prices
+from core.market_aggregator import ALL_MARKETS, TONNEL_PRICE_ADJUSTMENT, get_market_key, get_price_snapshot
+from core.gift_catalog import CatalogLookup, gift_catalog
+from core.watchlist import Subscription, WatchlistScheduler, watchlist_store
+from core.pricing import (
+    GIFT_FETCH_FAILED, GIFT_NOT_FOUND, extract_gift_link, fetch_gift, fetch_gift_details, get_gift_slug,
+    get_supported_markets, is_cached_not_found, normalize_link
+)
 
 setup_logging()
 log = logging.getLogger(__name__)
 
-TONNEL_PRICE_ADJUSTMENT = 1.06
+response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE)
 
 
 def create_reply_markup(bot_username: str) -> InlineKeyboardMarkup:
@@ -29,27 +43,19 @@ def create_reply_markup(bot_username: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
-async def fetch_gift_data(link: str) -> tuple[Optional[str], Optional[dict]]:
-    session = await session_manager.get_session()
-    link_task = session.get(link, timeout=15)
-    rates_task = get_rates()
-    
+async def fetch_gift_data(link: str) -> tuple[tuple[str, Optional[GiftDetails]], Optional[dict]]:
     try:
-        link_resp, rates_data = await asyncio.gather(link_task, rates_task)
-        
-        if not link_resp.ok:
-            log.warning("Failed to fetch gift link %s. Status: %d", link, link_resp.status)
-            return None, None
-            
-        html = link_resp.text
-        return html, rates_data
+        # Links known to be missing are answered without a rates call; real ones fetch both in parallel.
+        if is_cached_not_found(link):
+            return (GIFT_NOT_FOUND, None), None
+        return await asyncio.gather(fetch_gift(link), get_rates())
     except Exception as e:
         log.error("Error fetching gift data: %s", e)
-        return None, None
+        return (GIFT_FETCH_FAILED, None), None
 
 
 def build_price_message(
-    link: str,
+    link: Optional[str],
     gift_details: dict,
     market_prices: dict,
     ton_to_usd_rate: Optional[float],
@@ -57,97 +63,145 @@ def build_price_message(
 ) -> str:
     output = format_gift_details(gift_details, link)
 
-    output += format_market_output(
-        market_name="Tonnel",
-        market_url=TONNEL_URL,
-        price_simple=market_prices["tonnel"].price_simple,
-        error_simple=market_prices["tonnel"].error_simple,
-        price_detailed=market_prices["tonnel"].price_detailed,
-        error_detailed=market_prices["tonnel"].error_detailed,
-        ton_to_usd_rate=ton_to_usd_rate,
-        usdt_to_irr_rate=usdt_to_irr_rate,
-        adjustment_factor=TONNEL_PRICE_ADJUSTMENT
-    )
+    if "tonnel" in market_prices:
+        output += format_market_output(
+            market_name="Tonnel",
+            market_url=TONNEL_URL,
+            price_simple=market_prices["tonnel"].price_simple,
+            error_simple=market_prices["tonnel"].error_simple,
+            price_detailed=market_prices["tonnel"].price_detailed,
+            error_detailed=market_prices["tonnel"].error_detailed,
+            ton_to_usd_rate=ton_to_usd_rate,
+            usdt_to_irr_rate=usdt_to_irr_rate,
+            adjustment_factor=TONNEL_PRICE_ADJUSTMENT
+        )
 
-    output += format_market_output(
-        market_name="Portals",
-        market_url=PORTALS_URL,
-        price_simple=market_prices["portals"].price_simple,
-        error_simple=market_prices["portals"].error_simple,
-        price_detailed=market_prices["portals"].price_detailed,
-        error_detailed=market_prices["portals"].error_detailed,
-        ton_to_usd_rate=ton_to_usd_rate,
-        usdt_to_irr_rate=usdt_to_irr_rate
-    )
+    if "portals" in market_prices:
+        output += format_market_output(
+            market_name="Portals",
+            market_url=PORTALS_URL,
+            price_simple=market_prices["portals"].price_simple,
+            error_simple=market_prices["portals"].error_simple,
+            price_detailed=market_prices["portals"].price_detailed,
+            error_detailed=market_prices["portals"].error_detailed,
+            ton_to_usd_rate=ton_to_usd_rate,
+            usdt_to_irr_rate=usdt_to_irr_rate
+        )
 
-    output += format_market_output(
-        market_name="MRKT",
-        market_url=MRKT_URL,
-        price_simple=market_prices["mrkt"].price_simple,
-        error_simple=market_prices["mrkt"].error_simple,
-        price_detailed=market_prices["mrkt"].price_detailed,
-        error_detailed=market_prices["mrkt"].error_detailed,
-        ton_to_usd_rate=ton_to_usd_rate,
-        usdt_to_irr_rate=usdt_to_irr_rate,
-        is_nano_ton=True
-    )
+    if "mrkt" in market_prices:
+        output += format_market_output(
+            market_name="MRKT",
+            market_url=MRKT_URL,
+            price_simple=market_prices["mrkt"].price_simple,
+            error_simple=market_prices["mrkt"].error_simple,
+            price_detailed=market_prices["mrkt"].price_detailed,
+            error_detailed=market_prices["mrkt"].error_detailed,
+            ton_to_usd_rate=ton_to_usd_rate,
+            usdt_to_irr_rate=usdt_to_irr_rate,
+            is_nano_ton=True
+        )
 
     return output
 
 
+async def reply_gift_not_found(message, link: str) -> None:
+    await message.reply_text(
+        f'Gift not found! The link may be incorrect or expired:\n{link}',
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+
+async def reply_with_prices(
+    link: Optional[str],
+    gift_details: GiftDetails,
+    rates_data: dict,
+    message,
+    bot_username: str,
+    markets: Sequence[str] = ALL_MARKETS
+) -> None:
+    snapshot = await get_price_snapshot(gift_details, markets)
+    ton_to_usd_rate = quantize_rate(rates_data["ton_to_usd"])
+    usdt_to_irr_rate = quantize_rate(rates_data["usdt_to_irr"])
+    gift_key = get_gift_slug(link) if link else get_market_key(gift_details)
+    response_key = (gift_key, snapshot.version, ton_to_usd_rate, usdt_to_irr_rate)
+
+    output = response_cache.get(response_key)
+    count_cache_lookup("response", output is not None)
+    if output is None:
+        with track_stage("format"):
+            output = build_price_message(link, gift_details, snapshot.prices, ton_to_usd_rate, usdt_to_irr_rate)
+        if snapshot.complete:
+            response_cache.set(response_key, output)
+
+    reply_markup = create_reply_markup(bot_username)
+    with track_stage("telegram_send"):
+        await message.reply_text(
+            output,
+            parse_mode="HTML",
+            disable_web_page_preview=True,
+            reply_markup=reply_markup
+        )
+
+
 async def process_gift_link(link: str, message, bot_username: str) -> None:
-    if not link.startswith("http"):
-        link = "https://" + link
+    link = normalize_link(link)
     log.info("Processing gift link: %s", link)
 
     try:
-        html, rates_data = await fetch_gift_data(link)
+        (status, gift_details), rates_data = await fetch_gift_data(link)
         
-        if html is None:
+        if status == GIFT_FETCH_FAILED:
             await message.reply_text("Could not fetch the gift link. It might be invalid or expired.")
             return
 
-        if not rates_data:
-            await message.reply_text("Error fetching exchange rates. Please try again.")
+        if status == GIFT_NOT_FOUND:
+            await reply_gift_not_found(message, link)
             return
 
-        gift_details = parse_gift_page(html, link)
-
-        if not gift_details.get("model_name"):
-            log.info("No model details found for link %s. Assuming it's an invalid gift.", link)
-            await message.reply_text(
-                f'Gift not found! The link may be incorrect or expired:\n{link}',
-                parse_mode="HTML",
-                disable_web_page_preview=True
-            )
+        if not rates_data:
+            await message.reply_text("Error fetching exchange rates. Please try again.")
             return
 
-        market_prices = await fetch_all_market_prices(gift_details)
-        
-        output = build_price_message(
-            link, gift_details, market_prices,
-            rates_data["ton_to_usd"], rates_data["usdt_to_irr"]
-        )
-        
-        reply_markup = create_reply_markup(bot_username)
-        await message.reply_text(
-            output,
-            parse_mode="HTML",
-            disable_web_page_preview=True,
-            reply_markup=reply_markup
-        )
+        await reply_with_prices(link, gift_details, rates_data, message, bot_username)
         
     except Exception as e:
         log.error("Error in process_gift_link: %s", e, exc_info=True)
         await message.reply_text("An unexpected error occurred while processing the gift link.")
 
 
-def extract_gift_link(text: str) -> Optional[str]:
-    match = re.search(r"(https?://)?t\.me/nft/[\w-]+", text)
-    return match.group(0) if match else None
+async def process_gift_name(lookup: CatalogLookup, message, bot_username: str) -> None:
+    try:
+        if lookup.gift_details is None:
+            text = f"Unknown {lookup.field}: <code>{html.escape(lookup.query)}</code>"
+            if lookup.suggestions:
+                text += "\n\nDid you mean:\n" + "\n".join(
+                    f"- <code>{html.escape(name)}</code>" for name in lookup.suggestions
+                )
+            await message.reply_text(text, parse_mode="HTML")
+            return
+
+        log.info("Processing gift by name: %s", get_market_key(lookup.gift_details))
+        rates_data = await get_rates()
+        if not rates_data:
+            await message.reply_text("Error fetching exchange rates. Please try again.")
+            return
+        await reply_with_prices(
+            None, lookup.gift_details, rates_data, message, bot_username, get_supported_markets(lookup.gift_details)
+        )
+    except Exception as e:
+        log.error("Error in process_gift_name: %s", e, exc_info=True)
+        await message.reply_text("An unexpected error occurred while processing the gift.")
 
 
 async def price_command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    chat_id = update.effective_chat.id if update.effective_chat else None
+    with start_trace("price_command", update_id=update.update_id, chat_id=chat_id):
+        async with maybe_profile("price_command"):
+            await handle_price_command(update, context)
+
+
+async def handle_price_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     message = update.effective_message
     text_to_search = ""
 
@@ -157,10 +211,13 @@ async def price_command_handler(update: Update, context: ContextTypes.DEFAULT_TY
         text_to_search = message.reply_to_message.text
 
     link = extract_gift_link(text_to_search) if text_to_search else None
+    lookup = gift_catalog.resolve(text_to_search) if context.args and not link else None
 
     if link:
         target_message = message.reply_to_message if message.reply_to_message else message
         await process_gift_link(link, target_message, context.bot.username)
+    elif lookup and (lookup.gift_details or lookup.field):
+        await process_gift_name(lookup, message, context.bot.username)
     else:
         await message.reply_text(
             "Please provide a Telegram Gift link.\n\n"
@@ -168,11 +225,110 @@ async def price_command_handler(update: Update, context: ContextTypes.DEFAULT_TY
             "1. Send the command with a link:\n"
             "   <code>/p https://t.me/nft/...</code>\n\n"
             "2. Or, reply to a message that contains a link with just the command:\n"
-            "   <code>/p</code>",
+            "   <code>/p</code>\n\n"
+            "3. Or, name the collection, model and optionally the backdrop:\n"
+            "   <code>/p Plush Pepe, Cozy Galaxy, Black</code>",
             parse_mode="HTML"
         )
 
 
+WATCH_USAGE = (
+    "<b>Usage:</b>\n"
+    "<code>/watch https://t.me/nft/... 25</code> - alert when the model floor drops to 25 TON or below\n"
+    "<code>/watch https://t.me/nft/... 25 backdrop</code> - same, for model + backdrop\n"
+    "<code>/watch</code> - list your alerts in this chat\n"
+    "<code>/unwatch https://t.me/nft/...</code> or <code>/unwatch</code> - remove alerts"
+)
+
+
+def format_subscription(sub: Subscription) -> str:
+    label = "Model + Backdrop" if sub.with_backdrop else "Model"
+    return f'- <a href="{sub.link}">{sub.title}</a> ({label}) ≤ <code>{sub.target}</code> TON'
+
+
+async def watch_command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    message = update.effective_message
+    chat_id = update.effective_chat.id
+    user_id = update.effective_user.id
+    args = context.args or []
+
+    if not args:
+        subscriptions = watchlist_store.for_chat(chat_id, user_id)
+        if subscriptions:
+            text = "<b>Your price alerts:</b>\n" + "\n".join(format_subscription(sub) for sub in subscriptions)
+        else:
+            text = "You have no price alerts in this chat.\n\n" + WATCH_USAGE
+        await message.reply_text(text, parse_mode="HTML", disable_web_page_preview=True)
+        return
+
+    link = extract_gift_link(args[0])
+    try:
+        target = float(args[1].replace(",", ".")) if len(args) > 1 else None
+    except ValueError:
+        target = None
+
+    if not link or target is None or target <= 0:
+        await message.reply_text(WATCH_USAGE, parse_mode="HTML")
+        return
+
+    link = normalize_link(link)
+    with_backdrop = len(args) > 2 and args[2].lower() == "backdrop"
+
+    existing = watchlist_store.for_chat(chat_id, user_id)
+    if len(existing) >= WATCH_MAX_PER_USER and not any(sub.link == link and sub.with_backdrop == with_backdrop for sub in existing):
+        await message.reply_text(f"You can have at most {WATCH_MAX_PER_USER} price alerts per chat.")
+        return
+
+    try:
+        gift_details = await fetch_gift_details(link)
+    except Exception as e:
+        log.error("Error fetching gift details for watch %s: %s", link, e)
+        gift_details = None
+
+    if not gift_details or not gift_details.get("model_name"):
+        await reply_gift_not_found(message, link)
+        return
+
+    if with_backdrop and not gift_details.get("backdrop_name"):
+        await message.reply_text("This gift has no backdrop to watch.")
+        return
+
+    subscription = Subscription(
+        chat_id=chat_id,
+        user_id=user_id,
+        link=link,
+        title=gift_details["title"],
+        gift_name=gift_details["gift_name_clean"],
+        model_name=gift_details["model_name"],
+        model_percent=gift_details["model_percent"],
+        backdrop_name=gift_details["backdrop_name"],
+        backdrop_percent=gift_details["backdrop_percent"],
+        with_backdrop=with_backdrop,
+        target=target,
+    )
+    watchlist_store.add(subscription)
+    await message.reply_text(
+        "✅ Alert saved:\n" + format_subscription(subscription),
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+
+async def unwatch_command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    message = update.effective_message
+    link = extract_gift_link(" ".join(context.args)) if context.args else None
+
+    removed = watchlist_store.remove(
+        update.effective_chat.id,
+        update.effective_user.id,
+        normalize_link(link) if link else None
+    )
+    if removed:
+        await message.reply_text(f"Removed {removed} price alert(s).")
+    else:
+        await message.reply_text("No matching price alerts found.")
+
+
 async def send_welcome_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     welcome_text = """Hello! 👋🏻
 With this bot, you can send Telegram gift links to get their prices across all three markets (Portals, Tonnel, MRKT). Just send the gift link, and the bot will display the prices.
@@ -191,11 +347,43 @@ def main() -> None:
         log.error("BOT_TOKEN not found! Please set it in your .env file.")
         return
 
+    async def notify(chat_id: int, text: str) -> None:
+        await app.bot.send_message(chat_id, text, parse_mode="HTML", disable_web_page_preview=True)
+
+    async def report_auth_lost(session_name: str, error: str) -> None:
+        if ADMIN_CHAT_ID:
+            await app.bot.send_message(
+                ADMIN_CHAT_ID,
+                f"⚠️ Telethon session <code>{session_name}</code> lost its authorization ({error}). "
+                "Run generate_sessions.py and restart the bot.",
+                parse_mode="HTML"
+            )
+
+    watchlist_scheduler = WatchlistScheduler(watchlist_store, notify)
+    metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+    price_api_server = None
+    if API_PORT:
+        from core.price_api import PriceApiServer
+        price_api_server = PriceApiServer(API_HOST, API_PORT)
+
     async def on_startup(application) -> None:
         log.info("Bot application starting up...")
+        client_manager.start_supervisor(report_auth_lost)
+        watchlist_scheduler.start()
+        gift_catalog.start()
+        if metrics_server:
+            await metrics_server.start()
+        if price_api_server:
+            await price_api_server.start()
 
     async def on_shutdown(application) -> None:
         log.info("Bot application shutting down. Stopping Telethon clients and closing aiohttp session...")
+        await watchlist_scheduler.stop()
+        await gift_catalog.stop()
+        if metrics_server:
+            await metrics_server.stop()
+        if price_api_server:
+            await price_api_server.stop()
         await client_manager.stop_all()
         await session_manager.close()
         log.info("All resources cleaned up successfully.")
@@ -212,7 +400,11 @@ def main() -> None:
 
     app.add_handler(CommandHandler(["start", "help"], send_welcome_message))
     app.add_handler(CommandHandler(["p", "price"], price_command_handler))
+    app.add_handler(CommandHandler("watch", watch_command_handler))
+    app.add_handler(CommandHandler("unwatch", unwatch_command_handler))
 
+    # Telethon, curl_cffi and aiohttp load in the background while run_polling() connects to Telegram.
+    preload_in_background()
     log.info("Bot is now running. Press Ctrl+C to stop.")
     app.run_polling()
 
@@ -1,21 +1,44 @@
 import asyncio
 import os
-from typing import Dict, Optional
-from telethon import TelegramClient
-from utils.config import API_ID, API_HASH
+import random
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Set
+from utils.config import (
+    API_ID, API_HASH, CLIENT_PING_INTERVAL, CLIENT_PING_TIMEOUT, CLIENT_RECONNECT_MAX_DELAY,
+    CLIENT_AUTH_RETRY_INTERVAL, CLIENT_WAIT_TIMEOUT
+)
+from utils.metrics import count_telethon_event
+from utils.deferred_imports import import_module_async
 import logging
 
+if TYPE_CHECKING:
+    from telethon import TelegramClient
+
 log = logging.getLogger(__name__)
 
 _VALID_SESSIONS = {"portals", "mrkt"}
 
+AuthLostCallback = Callable[[str, str], Awaitable[None]]
+
+
+class SessionNotAuthorizedError(Exception):
+    pass
+
 
 class TelethonClientManager:
     def __init__(self) -> None:
-        self._clients: Dict[str, TelegramClient] = {}
+        self._clients: Dict[str, "TelegramClient"] = {}
         self._locks: Dict[str, asyncio.Lock] = {
             name: asyncio.Lock() for name in _VALID_SESSIONS
         }
+        self._ready: Dict[str, asyncio.Event] = {
+            name: asyncio.Event() for name in _VALID_SESSIONS
+        }
+        self._wake: Dict[str, asyncio.Event] = {
+            name: asyncio.Event() for name in _VALID_SESSIONS
+        }
+        self._supervisors: Dict[str, asyncio.Task] = {}
+        self._auth_lost: Set[str] = set()
+        self._on_auth_lost: Optional[AuthLostCallback] = None
 
     def _get_lock(self, session_name: str) -> asyncio.Lock:
         if session_name not in self._locks:
@@ -25,36 +48,154 @@ class TelethonClientManager:
             )
         return self._locks[session_name]
 
-    async def get_client(self, session_name: str) -> Optional[TelegramClient]:
+    def _session_path(self, session_name: str) -> str:
+        return os.path.join("markets", session_name)
+
+    async def _connect(self, session_name: str) -> "TelegramClient":
+        telethon = await import_module_async("telethon")
+        client = telethon.TelegramClient(self._session_path(session_name), API_ID, API_HASH)
+        await client.connect()
+        try:
+            if not await client.is_user_authorized():
+                raise SessionNotAuthorizedError(f"session '{session_name}' is not authorized")
+        except BaseException:
+            await client.disconnect()
+            raise
+        self._clients[session_name] = client
+        return client
+
+    async def _drop(self, session_name: str) -> None:
+        self._ready[session_name].clear()
+        client = self._clients.pop(session_name, None)
+        if client is not None:
+            try:
+                await client.disconnect()
+            except Exception as e:
+                log.debug("Error disconnecting Telethon client for '%s': %s", session_name, e)
+
+    async def get_client(self, session_name: str) -> Optional["TelegramClient"]:
         lock = self._get_lock(session_name)
+
+        if session_name in self._supervisors:
+            client = self._clients.get(session_name)
+            if client is not None and client.is_connected():
+                return client
+            if session_name in self._auth_lost:
+                log.error("Telethon session '%s' is not authorized. Please run generate_sessions.py.", session_name)
+                return None
+            # The supervisor owns (re)connecting: wake it instead of waiting for its next health check,
+            # then only wait briefly for the reconnect.
+            self._ready[session_name].clear()
+            self._wake[session_name].set()
+            try:
+                await asyncio.wait_for(self._ready[session_name].wait(), CLIENT_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                log.error("Telethon client for '%s' is not connected (supervisor is reconnecting).", session_name)
+                return None
+            return self._clients.get(session_name)
+
         async with lock:
             if session_name in self._clients and self._clients[session_name].is_connected():
                 return self._clients[session_name]
 
             log.info("Telethon client for '%s' not found or disconnected. Creating a new one.", session_name)
             try:
-                session_path = os.path.join("markets", session_name)
-                client = TelegramClient(session_path, API_ID, API_HASH)
-                await client.connect()
-
-                if not await client.is_user_authorized():
-                    log.error("Client for '%s' is not authorized. Please run generate_sessions.py first.", session_name)
-                    await client.disconnect()
-                    return None
-
-                self._clients[session_name] = client
+                client = await self._connect(session_name)
                 log.info("Successfully started and cached Telethon client for '%s'.", session_name)
                 return client
+            except SessionNotAuthorizedError:
+                log.error("Client for '%s' is not authorized. Please run generate_sessions.py first.", session_name)
+                return None
             except Exception as e:
                 log.error("Failed to start Telethon client for '%s': %s", session_name, e, exc_info=True)
                 return None
 
+    def start_supervisor(self, on_auth_lost: Optional[AuthLostCallback] = None) -> None:
+        """Keep every session connected in the background so requests never pay connection setup."""
+        self._on_auth_lost = on_auth_lost
+        for session_name in sorted(_VALID_SESSIONS):
+            if session_name in self._supervisors:
+                continue
+            if not os.path.exists(self._session_path(session_name) + ".session"):
+                log.warning("No Telethon session file for '%s'; run generate_sessions.py to enable it.", session_name)
+                continue
+            self._supervisors[session_name] = asyncio.create_task(self._supervise(session_name))
+
+    async def _report_auth_lost(self, session_name: str, error: Exception) -> None:
+        count_telethon_event(session_name, "auth_lost")
+        if session_name in self._auth_lost:
+            return
+        self._auth_lost.add(session_name)
+        log.critical(
+            "Telethon session '%s' is no longer authorized (%s). Portals/MRKT prices that depend on it will fail "
+            "until generate_sessions.py is run again.", session_name, error
+        )
+        if self._on_auth_lost is not None:
+            try:
+                await self._on_auth_lost(session_name, str(error))
+            except Exception as e:
+                log.error("Failed to report auth loss for '%s': %s", session_name, e)
+
+    async def _supervise(self, session_name: str) -> None:
+        await import_module_async("telethon")
+        from telethon.errors import AuthKeyDuplicatedError, UnauthorizedError
+        from telethon.tl.functions.updates import GetStateRequest
+
+        delay = 1.0
+        while True:
+            try:
+                client = self._clients.get(session_name)
+                if client is None or not client.is_connected():
+                    self._wake[session_name].clear()
+                    await self._drop(session_name)
+                    async with self._get_lock(session_name):
+                        await self._connect(session_name)
+                    count_telethon_event(session_name, "connected")
+                    if session_name in self._auth_lost:
+                        self._auth_lost.discard(session_name)
+                        log.warning("Telethon session '%s' is authorized again.", session_name)
+                    log.info("Telethon client for '%s' connected by supervisor.", session_name)
+                    self._ready[session_name].set()
+                    delay = 1.0
+                else:
+                    # An authorized call, unlike an MTProto ping, also surfaces revoked sessions.
+                    await asyncio.wait_for(client(GetStateRequest()), CLIENT_PING_TIMEOUT)
+                await self._sleep_until_woken(session_name, CLIENT_PING_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except (SessionNotAuthorizedError, UnauthorizedError, AuthKeyDuplicatedError) as e:
+                await self._drop(session_name)
+                await self._report_auth_lost(session_name, e)
+                await asyncio.sleep(CLIENT_AUTH_RETRY_INTERVAL)
+            except Exception as e:
+                await self._drop(session_name)
+                count_telethon_event(session_name, "reconnect")
+                wait = delay * random.uniform(0.8, 1.2)
+                log.warning("Telethon client for '%s' is unhealthy (%s). Reconnecting in %.1fs.", session_name, e, wait)
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, CLIENT_RECONNECT_MAX_DELAY)
+
+    async def _sleep_until_woken(self, session_name: str, seconds: float) -> None:
+        wake = self._wake[session_name]
+        try:
+            await asyncio.wait_for(wake.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+
     async def stop_all(self) -> None:
+        for task in self._supervisors.values():
+            task.cancel()
+        await asyncio.gather(*self._supervisors.values(), return_exceptions=True)
+        self._supervisors.clear()
+
         for session_name, client in self._clients.items():
             if client and client.is_connected():
                 await client.disconnect()
                 log.info("Stopped Telethon client for '%s'.", session_name)
         self._clients.clear()
+        for ready in self._ready.values():
+            ready.clear()
 
 
-client_manager = TelethonClientManager()
\ No newline at end of file
+client_manager = TelethonClientManager()
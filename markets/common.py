@@ -1,10 +1,9 @@
 import logging
 from typing import Optional
 from urllib.parse import unquote
-from telethon.tl.functions.messages import RequestAppWebViewRequest
-from telethon.tl.types import InputBotAppShortName, InputUser
 
 from .client_manager import client_manager
+from utils.metrics import track_stage
 
 log = logging.getLogger(__name__)
 
@@ -14,12 +13,28 @@ async def get_webapp_init_data(
     bot_username: str,
     bot_short_name: str,
     platform: str = "android",
+) -> Optional[str]:
+    with track_stage("init_data", session_name) as stage:
+        init_data = await request_webapp_init_data(session_name, bot_username, bot_short_name, platform)
+        if init_data is None:
+            stage.outcome = "error"
+        return init_data
+
+
+async def request_webapp_init_data(
+    session_name: str,
+    bot_username: str,
+    bot_short_name: str,
+    platform: str,
 ) -> Optional[str]:
     client = await client_manager.get_client(session_name)
     if not client:
         log.error("Could not get a valid Telethon client for session '%s'.", session_name)
         return None
 
+    from telethon.tl.functions.messages import RequestAppWebViewRequest
+    from telethon.tl.types import InputBotAppShortName, InputUser
+
     try:
         bot_entity = await client.get_entity(bot_username)
         
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, List, NamedTuple, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+PAGE_RETRIES = 3
+PAGE_RETRY_DELAY = 2
+
+
+class Listing(NamedTuple):
+    """One listed gift, with `price` in the market's own unit (see core.market_aggregator.to_ton)."""
+    market: str
+    id: str
+    collection: Optional[str]
+    model: Optional[str]
+    backdrop: Optional[str]
+    symbol: Optional[str]
+    price: float
+
+
+Page = Tuple[List[Listing], Optional[Any]]
+PageFetcher = Callable[[Any], Awaitable[Page]]
+
+
+async def fetch_page_with_retries(market: str, fetch_page: PageFetcher, cursor: Any) -> Page:
+    attempt = 1
+    while True:
+        try:
+            return await fetch_page(cursor)
+        except Exception as e:
+            log.warning("%s listings page %r attempt %d/%d failed: %s", market, cursor, attempt, PAGE_RETRIES, e)
+            if attempt == PAGE_RETRIES:
+                raise
+            attempt += 1
+            await asyncio.sleep(PAGE_RETRY_DELAY)
+
+
+async def paginate(market: str, fetch_page: PageFetcher, first_cursor: Any) -> AsyncIterator[Listing]:
+    """Yield listings page by page, requesting the next page while the current one is consumed.
+
+    `fetch_page(cursor)` returns the page's listings and the next cursor, or None on the last page.
+    Closing the generator early (break inside `contextlib.aclosing`) cancels the prefetch.
+    """
+    task: Optional[asyncio.Future] = asyncio.ensure_future(fetch_page_with_retries(market, fetch_page, first_cursor))
+    try:
+        while task is not None:
+            listings, next_cursor = await task
+            task = None
+            if next_cursor is not None and listings:
+                task = asyncio.ensure_future(fetch_page_with_retries(market, fetch_page, next_cursor))
+            for listing in listings:
+                yield listing
+    finally:
+        if task is not None:
+            task.cancel()
@@ -1,26 +1,35 @@
 import asyncio
 import logging
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 
 from .common import get_webapp_init_data
+from .listings import Listing, Page, paginate
 from utils.session_manager import session_manager
+from utils.metrics import track_stage
 
 MRKT_API_URL = "https://api.tgmrkt.io/api/v1"
 BOT_USERNAME = "mrkt"
 BOT_SHORT_NAME = "app"
 PLATFORM = "android"
+MRKT_PAGE_SIZE = 20
 log = logging.getLogger(__name__)
 
 
 async def get_token(session, init_data: str) -> Optional[str]:
-    try:
-        response = await session.post(f"{MRKT_API_URL}/auth", json={"data": init_data}, timeout=20)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("token")
-    except Exception as e:
-        log.error("Error getting MRKT token: %s", e)
-    return None
+    with track_stage("mrkt_auth", "mrkt") as stage:
+        try:
+            response = await session.post(f"{MRKT_API_URL}/auth", json={"data": init_data}, timeout=20)
+            response.raise_for_status()
+            data = response.json()
+            token = data.get("token")
+            if not token:
+                stage.outcome = "no_token"
+            return token
+        except Exception as e:
+            stage.outcome = "error"
+            log.error("Error getting MRKT token: %s", e)
+        return None
 
 
 async def get_mrkt_prices(collection_name: str, model_name: str, backdrop_name: str) -> tuple[Optional[int], Optional[int]] | tuple[str, str]:
@@ -80,7 +89,69 @@ async def get_mrkt_prices(collection_name: str, model_name: str, backdrop_name:
 
         return "ERROR"
 
+    if not backdrop_name:
+        # Nothing to filter on (backdropNames: [""] never matches), so only the model query is sent.
+        return await fetch(payload_without), None
+
     return await asyncio.gather(
         fetch(payload_without),
         fetch(payload_with)
-    )
\ No newline at end of file
+    )
+
+
+async def iter_mrkt_listings(collection_name: str, model: Optional[str] = None, backdrop: Optional[str] = None) -> AsyncIterator[Listing]:
+    """Listings cheapest first, paged by MRKT's cursor. Prices are in nanoTON."""
+    init_data = await get_webapp_init_data(
+        session_name="mrkt",
+        bot_username=BOT_USERNAME,
+        bot_short_name=BOT_SHORT_NAME,
+        platform=PLATFORM,
+    )
+    if not init_data:
+        raise RuntimeError("MRKT init data is unavailable")
+
+    session = await session_manager.get_session()
+    token = await get_token(session, init_data)
+    if not token:
+        raise RuntimeError("MRKT authentication failed")
+
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    payload_base = {
+        "count": MRKT_PAGE_SIZE,
+        "collectionNames": [collection_name],
+        "modelNames": [model] if model else [],
+        "backdropNames": [backdrop] if backdrop else [],
+        "symbolNames": [],
+        "number": None,
+        "isNew": None,
+        "isPremarket": None,
+        "minPrice": None,
+        "maxPrice": None,
+        "ordering": "Price",
+        "lowToHigh": True,
+        "query": None
+    }
+
+    async def fetch_page(cursor: str) -> Page:
+        response = await session.post(
+            f"{MRKT_API_URL}/gifts/saling", headers=headers, json={**payload_base, "cursor": cursor}, timeout=15
+        )
+        response.raise_for_status()
+        data = response.json()
+        listings = [
+            Listing(
+                "mrkt",
+                str(gift.get("id")),
+                gift.get("collectionName", collection_name),
+                gift.get("modelName"),
+                gift.get("backdropName"),
+                gift.get("symbolName"),
+                float(gift["salePrice"])
+            )
+            for gift in data.get("gifts", []) if gift.get("salePrice") is not None
+        ]
+        return listings, data.get("cursor") or None
+
+    async with aclosing(paginate("mrkt", fetch_page, "")) as listings:
+        async for listing in listings:
+            yield listing
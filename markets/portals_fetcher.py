@@ -1,28 +1,25 @@
 import asyncio
 import logging
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 
 from .common import get_webapp_init_data
+from .listings import Listing, Page, paginate
 from utils.session_manager import session_manager
+from utils.cache import negative_cache
+from utils.metrics import track_stage
 
 PORTALS_API_URL = 'https://portal-market.com/api'
 BOT_USERNAME = "portals"
 BOT_SHORT_NAME = "market"
 PLATFORM = "android"
+PORTALS_PAGE_SIZE = 50
 log = logging.getLogger(__name__)
 
 
-async def get_portal_prices(collection_name: str, model_name: str, backdrop_name: str) -> tuple[Optional[float], Optional[float]] | tuple[str, str]:
-    init_data = await get_webapp_init_data(
-        session_name="portals",
-        bot_username=BOT_USERNAME,
-        bot_short_name=BOT_SHORT_NAME,
-        platform=PLATFORM,
-    )
-    if not init_data:
-        return "ERROR", "ERROR"
-
-    async def get_collection_id(session, collection_name: str) -> Optional[str]:
+async def get_collection_id(session, collection_name: str, init_data: str) -> Optional[str]:
+    """Collection id, None if Portals has no such collection, or "ERROR" if the lookup failed."""
+    with track_stage("portals_collection", "portals") as stage:
         try:
             search_params = {"search": collection_name}
             response = await session.get(
@@ -37,10 +34,28 @@ async def get_portal_prices(collection_name: str, model_name: str, backdrop_name
             if collections:
                 return collections[0].get("id")
             log.warning("No collection found for search term: %s", collection_name)
+            stage.outcome = "not_found"
+            negative_cache.set(("portals_collection", collection_name))
             return None
         except Exception as e:
+            stage.outcome = "error"
             log.error("Error fetching collection ID for '%s': %s", collection_name, e)
-            return None
+            return "ERROR"
+
+
+async def get_portal_prices(collection_name: str, model_name: str, backdrop_name: str) -> tuple[Optional[float], Optional[float]] | tuple[str, str]:
+    if ("portals_collection", collection_name) in negative_cache:
+        log.debug("Collection '%s' is cached as unknown on Portals.", collection_name)
+        return None, None
+
+    init_data = await get_webapp_init_data(
+        session_name="portals",
+        bot_username=BOT_USERNAME,
+        bot_short_name=BOT_SHORT_NAME,
+        platform=PLATFORM,
+    )
+    if not init_data:
+        return "ERROR", "ERROR"
 
     async def fetch(session, collection_id: str, model_name: str, backdrop_name: Optional[str]) -> Optional[float] | str:
         retries = 3
@@ -83,13 +98,140 @@ async def get_portal_prices(collection_name: str, model_name: str, backdrop_name
 
     session = await session_manager.get_session()
 
-    collection_id = await get_collection_id(session, collection_name)
+    collection_id = await get_collection_id(session, collection_name, init_data)
 
+    if collection_id == "ERROR":
+        return "ERROR", "ERROR"
     if not collection_id:
         log.error("Could not find collection ID for '%s'", collection_name)
         return None, None
 
+    if not backdrop_name:
+        # Without a backdrop the second query would repeat the model query.
+        return await fetch(session, collection_id, model_name, None), None
+
     return await asyncio.gather(
         fetch(session, collection_id, model_name, None),
         fetch(session, collection_id, model_name, backdrop_name)
-    )
\ No newline at end of file
+    )
+
+
+async def iter_portals_listings(collection_name: str, model: Optional[str] = None, backdrop: Optional[str] = None) -> AsyncIterator[Listing]:
+    """Listings cheapest first, paged by offset."""
+    init_data = await get_webapp_init_data(
+        session_name="portals",
+        bot_username=BOT_USERNAME,
+        bot_short_name=BOT_SHORT_NAME,
+        platform=PLATFORM,
+    )
+    if not init_data:
+        raise RuntimeError("Portals init data is unavailable")
+
+    session = await session_manager.get_session()
+    collection_id = await get_collection_id(session, collection_name, init_data)
+    if collection_id == "ERROR":
+        raise RuntimeError(f"Portals collection lookup failed for '{collection_name}'")
+    if not collection_id:
+        return
+
+    params = {
+        "limit": PORTALS_PAGE_SIZE,
+        "collection_ids": collection_id,
+        "sort_by": "price asc",
+        "status": "listed",
+        "premarket_status": "all",
+    }
+    if model:
+        params["filter_by_models"] = model
+    if backdrop:
+        params["filter_by_backdrops"] = backdrop
+
+    async def fetch_page(offset: int) -> Page:
+        response = await session.get(
+            f"{PORTALS_API_URL}/nfts/search",
+            params={**params, "offset": offset},
+            timeout=15,
+            headers={'Authorization': f'tma {init_data}'}
+        )
+        response.raise_for_status()
+        results = response.json().get("results", [])
+        listings = []
+        for item in results:
+            if item.get("price") is None:
+                continue
+            attributes = {attr.get("type"): attr.get("value") for attr in item.get("attributes") or []}
+            listings.append(Listing(
+                "portals",
+                str(item.get("id")),
+                item.get("name", collection_name),
+                attributes.get("model"),
+                attributes.get("backdrop"),
+                attributes.get("symbol"),
+                float(item["price"])
+            ))
+        return listings, offset + len(results) if len(results) >= PORTALS_PAGE_SIZE else None
+
+    async with aclosing(paginate("portals", fetch_page, 0)) as listings:
+        async for listing in listings:
+            yield listing
+
+
+def per_mille_to_percent(value) -> Optional[str]:
+    try:
+        return f"{float(value) / 10:g}%"
+    except (TypeError, ValueError):
+        return None
+
+
+async def get_portals_catalog() -> Optional[dict]:
+    """Collection and model names plus backdrop rarities as listed by Portals' filter endpoints."""
+    init_data = await get_webapp_init_data(
+        session_name="portals",
+        bot_username=BOT_USERNAME,
+        bot_short_name=BOT_SHORT_NAME,
+        platform=PLATFORM,
+    )
+    if not init_data:
+        return None
+
+    session = await session_manager.get_session()
+    headers = {'Authorization': f'tma {init_data}'}
+
+    with track_stage("catalog_refresh", "portals") as stage:
+        try:
+            response = await session.get(f"{PORTALS_API_URL}/collections", params={"limit": 1000}, timeout=30, headers=headers)
+            response.raise_for_status()
+            collections = {
+                item["short_name"]: item["name"]
+                for item in response.json().get("collections", [])
+                if item.get("short_name") and item.get("name")
+            }
+
+            response = await session.get(f"{PORTALS_API_URL}/collections/filters/backdrops", timeout=30, headers=headers)
+            response.raise_for_status()
+            backdrops = {
+                item["name"]: per_mille_to_percent(item.get("rarity_per_mille"))
+                for item in response.json().get("backdrops", [])
+                if item.get("name")
+            }
+
+            models_by_collection = {}
+            short_names = list(collections)
+            for start in range(0, len(short_names), 20):
+                batch = short_names[start:start + 20]
+                response = await session.get(
+                    f"{PORTALS_API_URL}/collections/filters",
+                    params={"short_names": ",".join(batch)},
+                    timeout=30,
+                    headers=headers
+                )
+                response.raise_for_status()
+                floors = response.json().get("floor_prices", {})
+                for short_name in batch:
+                    models = (floors.get(short_name) or {}).get("models") or {}
+                    models_by_collection[collections[short_name]] = list(models)
+            return {"collections": models_by_collection, "backdrops": backdrops}
+        except Exception as e:
+            stage.outcome = "error"
+            log.error("Error fetching the Portals gift catalog: %s", e)
+            return None
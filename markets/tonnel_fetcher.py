@@ -1,30 +1,33 @@
 import json
 import logging
 import asyncio
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 
 from utils.session_manager import session_manager
+from .listings import Listing, Page, paginate
 
+TONNEL_API_URL = "https://gifts3.tonnel.network/api"
+TONNEL_PAGE_SIZE = 30
+TONNEL_HEADERS = {
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Cache-Control": "no-cache",
+    "Origin": "https://market.tonnel.network",
+    "Referer": "https://market.tonnel.network/"
+}
 log = logging.getLogger(__name__)
 
 
 async def get_tonnel_prices(gift_name: str, model: str, backdrop: str) -> tuple[Optional[float], Optional[float]] | tuple[str, str]:
     session = await session_manager.get_session()
 
-    headers = {
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Cache-Control": "no-cache",
-        "Origin": "https://market.tonnel.network",
-        "Referer": "https://market.tonnel.network/"
-    }
-
     async def fetch(payload: dict) -> Optional[float] | str:
         retries = 3
         delay = 2
         for attempt in range(retries):
             try:
-                res = await session.post("https://gifts3.tonnel.network/api/pageGifts", headers=headers, json=payload, timeout=15)
+                res = await session.post(f"{TONNEL_API_URL}/pageGifts", headers=TONNEL_HEADERS, json=payload, timeout=15)
                 res.raise_for_status()
                 data = res.json()
                 if isinstance(data, list) and data:
@@ -62,6 +65,9 @@ async def get_tonnel_prices(gift_name: str, model: str, backdrop: str) -> tuple[
     payload_with = {**base_payload, "filter": json.dumps(filter_with_backdrop)}
 
     try:
+        if not backdrop:
+            # Nothing to filter on ("$in": [""] never matches), so only the model query is sent.
+            return await fetch(payload_without), None
         results = await asyncio.gather(
             fetch(payload_without),
             fetch(payload_with)
@@ -69,4 +75,46 @@ async def get_tonnel_prices(gift_name: str, model: str, backdrop: str) -> tuple[
         return results[0], results[1]
     except Exception as e:
         log.error("Unexpected error in Tonnel async fetcher: %s", e)
-        return "ERROR", "ERROR"
\ No newline at end of file
+        return "ERROR", "ERROR"
+
+
+async def iter_tonnel_listings(gift_name: str, model: Optional[str] = None, backdrop: Optional[str] = None) -> AsyncIterator[Listing]:
+    """Listings cheapest first. Tonnel filters on "Name (percent%)" for model and backdrop."""
+    query = {"price": {"$exists": True}, "buyer": {"$exists": False}, "gift_name": gift_name, "asset": "TON"}
+    if model:
+        query["model"] = model
+    if backdrop:
+        query["backdrop"] = {"$in": [backdrop]}
+
+    async def fetch_page(page: int) -> Page:
+        session = await session_manager.get_session()
+        payload = {
+            "page": page,
+            "limit": TONNEL_PAGE_SIZE,
+            "sort": "{\"price\":1,\"gift_id\":-1}",
+            "filter": json.dumps(query),
+            "ref": 0,
+            "price_range": None,
+            "user_auth": ""
+        }
+        res = await session.post(f"{TONNEL_API_URL}/pageGifts", headers=TONNEL_HEADERS, json=payload, timeout=15)
+        res.raise_for_status()
+        data = res.json()
+        items = data if isinstance(data, list) else []
+        listings = [
+            Listing(
+                "tonnel",
+                str(item.get("gift_id")),
+                item.get("name", gift_name),
+                item.get("model"),
+                item.get("backdrop"),
+                item.get("symbol"),
+                float(item["price"])
+            )
+            for item in items if item.get("price") is not None
+        ]
+        return listings, page + 1 if len(items) >= TONNEL_PAGE_SIZE else None
+
+    async with aclosing(paginate("tonnel", fetch_page, 1)) as listings:
+        async for listing in listings:
+            yield listing
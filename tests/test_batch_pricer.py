@@ -0,0 +1,92 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+import batch_pricer
+from batch_pricer import BatchPricer, Checkpoint
+from core.pricing import GIFT_OK
+
+
+def gift_details(link: str):
+    slug = link.rsplit("/", 1)[-1]
+    number = slug.rsplit("-", 1)[-1]
+    return {
+        "title": f"Plush Pepe #{number}",
+        "gift_name_clean": "Plush Pepe",
+        "model_name": "Cozy Galaxy",
+        "model_percent": "1.2%",
+        "backdrop_name": "Onyx Black",
+        "backdrop_percent": "2%",
+        "symbol_name": None,
+        "symbol_percent": None,
+    }
+
+
+@pytest.fixture
+def priced(monkeypatch):
+    calls = []
+
+    async def fake_lookup_gift(link):
+        return GIFT_OK, gift_details(link)
+
+    async def fake_price_markets(details):
+        calls.append(details["title"])
+        return {"portals": {"model": {"ton": 10.0}, "model_backdrop": {"ton": 20.0}}}
+
+    monkeypatch.setattr(batch_pricer, "lookup_gift", fake_lookup_gift)
+    monkeypatch.setattr(batch_pricer, "price_markets", fake_price_markets)
+    return calls
+
+
+def run_pricer(source: str, output, checkpoint: Checkpoint) -> BatchPricer:
+    pricer = BatchPricer(output, checkpoint, concurrency=2, dedupe_size=100)
+    asyncio.run(pricer.run(io.StringIO(source)))
+    return pricer
+
+
+def test_deduplicated_links_keep_their_own_gift(priced):
+    output = io.StringIO()
+    run_pricer("https://t.me/nft/PlushPepe-1\nhttps://t.me/nft/PlushPepe-2\n", output, Checkpoint(None))
+
+    rows = {row["line"]: row for row in map(json.loads, output.getvalue().splitlines())}
+    assert len(priced) == 1
+    assert rows[1]["gift"]["title"] == "Plush Pepe #1"
+    assert rows[2]["gift"]["title"] == "Plush Pepe #2"
+    assert rows[2]["prices"] == rows[1]["prices"]
+
+
+def test_blank_lines_do_not_hold_back_the_checkpoint(priced, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "out.checkpoint"))
+    lines = ["https://t.me/nft/PlushPepe-1", ""] + [f"https://t.me/nft/PlushPepe-{i}" for i in range(2, 200)]
+    run_pricer("\n".join(lines) + "\n", io.StringIO(), checkpoint)
+
+    with open(checkpoint.path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["lines_done"] == len(lines)
+    assert saved["done_ahead"] == []
+
+
+def test_resume_truncates_output_to_checkpoint_and_skips_done_lines(priced, tmp_path):
+    source = tmp_path / "links.txt"
+    output = tmp_path / "prices.jsonl"
+    links = [f"https://t.me/nft/PlushPepe-{i}" for i in range(1, 4)]
+
+    source.write_text(f"{links[0]}\n\n{links[1]}\n", encoding="utf-8")
+    asyncio.run(batch_pricer.run(batch_pricer.parse_args([str(source), "-o", str(output)])))
+    # A hard kill after the last checkpoint: an uncheckpointed row and a half-written line.
+    with open(output, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"line": 5, "link": links[2], "status": "ok"}) + '\n{"line": 6, "sta')
+
+    source.write_text(f"{links[0]}\n\n{links[1]}\n\n{links[2]}\n", encoding="utf-8")
+    del priced[:]
+    asyncio.run(batch_pricer.run(batch_pricer.parse_args([str(source), "-o", str(output), "--resume"])))
+
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(row["line"] for row in rows) == [1, 3, 5]
+    assert priced == ["Plush Pepe #3"]
+    with open(f"{output}.checkpoint", encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["lines_done"] == 5
+    assert saved["output_offset"] == output.stat().st_size
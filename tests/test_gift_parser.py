@@ -0,0 +1,42 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from core.gift_parser import parse_gift_page, parse_gift_stream
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "gift_pages")
+LINK = "https://t.me/nft/PlushPepe-1234"
+
+# Produced by the BeautifulSoup parser this module replaced, run on the pages next to it.
+with open(os.path.join(FIXTURES, "expected.json"), encoding="utf-8") as f:
+    EXPECTED = json.load(f)
+
+
+def load_page(name: str) -> str:
+    with open(os.path.join(FIXTURES, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+async def iter_chunks(body: bytes, chunk_size: int):
+    for i in range(0, len(body), chunk_size):
+        yield body[i:i + chunk_size]
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_parse_gift_page_matches_baseline(name):
+    assert parse_gift_page(load_page(name), LINK) == EXPECTED[name]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_parse_gift_stream_matches_baseline(name, chunk_size):
+    chunks = iter_chunks(load_page(name).encode("utf-8"), chunk_size)
+    assert asyncio.run(parse_gift_stream(chunks, LINK)) == EXPECTED[name]
+
+
+def test_row_left_open_at_table_end_is_kept():
+    details = parse_gift_page(load_page("last_row_unclosed"), LINK)
+    assert details["backdrop_name"] == "B"
+    assert details["backdrop_percent"] == "2%"
@@ -0,0 +1,62 @@
+import asyncio
+
+import main
+from core.market_aggregator import PriceSnapshot
+from core.pricing import GIFT_NOT_FOUND, GIFT_OK, get_gift_slug
+from utils.cache import negative_cache
+
+LINK = "https://t.me/nft/PlushPepe-404"
+
+
+def test_cached_not_found_link_skips_upstream_calls(monkeypatch):
+    calls = []
+
+    async def fake_get_rates():
+        calls.append("rates")
+        return {"ton_to_usd": 3.0}
+
+    async def fake_fetch_gift(link):
+        calls.append("gift")
+        return GIFT_OK, {}
+
+    monkeypatch.setattr(main, "get_rates", fake_get_rates)
+    monkeypatch.setattr(main, "fetch_gift", fake_fetch_gift)
+    key = ("gift_slug", get_gift_slug(LINK))
+    negative_cache.set(key)
+    try:
+        assert asyncio.run(main.fetch_gift_data(LINK)) == ((GIFT_NOT_FOUND, None), None)
+    finally:
+        negative_cache.discard(key)
+    assert calls == []
+
+
+def test_response_cache_is_keyed_on_gift_slug_and_rounded_rates(monkeypatch):
+    snapshot = PriceSnapshot(version=1, fetched_at=0.0, prices={}, complete=True)
+    built = []
+
+    async def fake_get_price_snapshot(gift_details, markets):
+        return snapshot
+
+    def fake_build_price_message(link, gift_details, prices, ton_to_usd_rate, usdt_to_irr_rate):
+        built.append((ton_to_usd_rate, usdt_to_irr_rate))
+        return "prices"
+
+    class Message:
+        async def reply_text(self, text, **kwargs):
+            pass
+
+    monkeypatch.setattr(main, "get_price_snapshot", fake_get_price_snapshot)
+    monkeypatch.setattr(main, "build_price_message", fake_build_price_message)
+    main.response_cache.clear()
+
+    async def reply(link, ton_to_usd, usdt_to_irr):
+        rates = {"ton_to_usd": ton_to_usd, "usdt_to_irr": usdt_to_irr}
+        await main.reply_with_prices(link, {}, rates, Message(), "bot")
+
+    asyncio.run(reply("https://t.me/nft/PlushPepe-1", 3.45671, 1023456.0))
+    asyncio.run(reply("https://t.me/nft/plushpepe-1/", 3.45674, 1023489.0))
+    assert built == [(3.457, 1023000.0)]
+
+    asyncio.run(reply("https://t.me/nft/PlushPepe-1", 3.51, 1023456.0))
+    assert len(built) == 2
+    main.response_cache.clear()
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+import markets.mrkt_fetcher as mrkt_fetcher
+import markets.portals_fetcher as portals_fetcher
+import markets.tonnel_fetcher as tonnel_fetcher
+
+
+class FakeResponse:
+    def __init__(self, data) -> None:
+        self._data = data
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    """Answers every market endpoint with one listing and records the queries sent."""
+
+    def __init__(self) -> None:
+        self.queries = []
+
+    async def get(self, url, params=None, **kwargs):
+        if url.endswith("/collections"):
+            return FakeResponse({"collections": [{"id": "collection-1"}]})
+        self.queries.append(params)
+        return FakeResponse({"results": [{"price": "12.5"}]})
+
+    async def post(self, url, json=None, **kwargs):
+        if url.endswith("/auth"):
+            return FakeResponse({"token": "token"})
+        self.queries.append(json)
+        return FakeResponse([{"price": 12.5}] if "tonnel" in url else {"gifts": [{"salePrice": 12500000000}]})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+
+    async def get_session():
+        return fake
+
+    async def get_webapp_init_data(**kwargs):
+        return "init-data"
+
+    for module in (tonnel_fetcher, portals_fetcher, mrkt_fetcher):
+        monkeypatch.setattr(module.session_manager, "get_session", get_session)
+    for module in (portals_fetcher, mrkt_fetcher):
+        monkeypatch.setattr(module, "get_webapp_init_data", get_webapp_init_data)
+    return fake
+
+
+@pytest.mark.parametrize("fetcher", [
+    tonnel_fetcher.get_tonnel_prices, portals_fetcher.get_portal_prices, mrkt_fetcher.get_mrkt_prices,
+])
+def test_no_backdrop_sends_only_the_model_query(session, fetcher):
+    simple, detailed = asyncio.run(fetcher("Plush Pepe", "Cozy Galaxy", ""))
+    assert simple is not None and simple != "ERROR"
+    assert detailed is None
+    assert len(session.queries) == 1
+
+
+@pytest.mark.parametrize("fetcher", [
+    tonnel_fetcher.get_tonnel_prices, portals_fetcher.get_portal_prices, mrkt_fetcher.get_mrkt_prices,
+])
+def test_backdrop_sends_model_and_backdrop_queries(session, fetcher):
+    simple, detailed = asyncio.run(fetcher("Plush Pepe", "Cozy Galaxy", "Onyx Black"))
+    assert simple == detailed
+    assert len(session.queries) == 2
@@ -0,0 +1,52 @@
+from utils.metrics import (
+    Counter, Histogram, count_cache_lookup, count_telethon_event, observe_stage, render_metrics
+)
+
+
+def metric_names(lines):
+    """Names declared by # TYPE lines, and the metric names used by samples."""
+    declared = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    sampled = {line.split("{")[0].split(" ")[0] for line in lines if not line.startswith("#")}
+    return declared, sampled
+
+
+def test_counter_samples_use_the_declared_name():
+    counter = Counter("test_lookups_total", "Lookups.", ("cache", "result"))
+    counter.inc(("gift", "hit"))
+    counter.inc(("gift", "hit"))
+    counter.inc(("gift", "miss"))
+
+    assert counter.render() == [
+        "# HELP test_lookups_total Lookups.",
+        "# TYPE test_lookups_total counter",
+        'test_lookups_total{cache="gift",result="hit"} 2.0',
+        'test_lookups_total{cache="gift",result="miss"} 1.0',
+    ]
+
+
+def test_histogram_render():
+    histogram = Histogram("test_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, ("parse",))
+    histogram.observe(0.5, ("parse",))
+
+    assert histogram.render() == [
+        "# HELP test_seconds Latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="parse",le="0.1"} 1',
+        'test_seconds_bucket{stage="parse",le="1.0"} 2',
+        'test_seconds_bucket{stage="parse",le="+Inf"} 2',
+        'test_seconds_sum{stage="parse"} 0.55',
+        'test_seconds_count{stage="parse"} 2',
+    ]
+
+
+def test_registry_samples_are_all_typed():
+    count_cache_lookup("gift_not_found", True)
+    count_telethon_event("portals", "connected")
+    observe_stage("parse", 0.01)
+
+    declared, sampled = metric_names(render_metrics().splitlines())
+    histogram_suffixes = ("_bucket", "_sum", "_count")
+    for name in sampled:
+        base = next((name[:-len(s)] for s in histogram_suffixes if name.endswith(s) and name[:-len(s)] in declared), name)
+        assert base in declared, name
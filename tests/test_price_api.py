@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import core.price_api as price_api
+from core.price_api import PriceApiServer, parse_batch_item
+
+
+@pytest.mark.parametrize("field", ["backdrop", "model_percent", "backdrop_percent"])
+@pytest.mark.parametrize("value", [["Onyx Black"], {"name": "Onyx Black"}, 2])
+def test_parse_batch_item_rejects_non_string_optional_fields(field, value):
+    key, error = parse_batch_item({"collection": "Plush Pepe", "model": "Cozy Galaxy", field: value})
+    assert key is None
+    assert field in error
+
+
+def test_parse_batch_item_accepts_null_optional_fields():
+    key, gift_details = parse_batch_item({"collection": "Plush Pepe", "model": "Cozy Galaxy", "backdrop": None})
+    assert key is not None
+    assert gift_details["backdrop_name"] is None
+
+
+def test_batch_reports_malformed_items_per_line(monkeypatch):
+    async def fake_run_job(job):
+        return {"status": "ok"}
+
+    monkeypatch.setattr(price_api, "run_job", fake_run_job)
+
+    async def post(items):
+        app = web.Application()
+        app.router.add_post("/price/batch", PriceApiServer("127.0.0.1", 0)._handle_batch)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post("/price/batch", json=items)
+            return response.status, [json.loads(line) for line in (await response.text()).splitlines()]
+
+    status, lines = asyncio.run(post([
+        ["Plush Pepe", "Cozy Galaxy", ["Onyx Black"]],
+        {"collection": "Plush Pepe", "model": "Cozy Galaxy", "model_percent": {"value": "1.2%"}},
+        ["Plush Pepe", "Cozy Galaxy", "Onyx Black"],
+    ]))
+
+    assert status == 200
+    by_index = {index: line for line in lines for index in line["indexes"]}
+    assert by_index[0]["status"] == "invalid"
+    assert by_index[1]["status"] == "invalid"
+    assert by_index[2]["status"] == "ok"
@@ -0,0 +1,43 @@
+import asyncio
+
+import core.watchlist as watchlist
+from core.watchlist import Subscription, WatchlistScheduler, WatchlistStore
+
+
+def subscription(user_id: int, with_backdrop: bool, target: float) -> Subscription:
+    return Subscription(
+        chat_id=user_id, user_id=user_id, link="https://t.me/nft/PlushPepe-1", title="Plush Pepe #1",
+        gift_name="Plush Pepe", model_name="Cozy Galaxy", model_percent="1.2%",
+        backdrop_name="Onyx Black", backdrop_percent="2%", with_backdrop=with_backdrop, target=target,
+    )
+
+
+def test_model_only_alerts_share_the_with_backdrop_query(tmp_path, monkeypatch):
+    queries = []
+
+    async def fake_fetch_market_prices(market, fetcher, collection, model, backdrop):
+        queries.append((market, collection, model, backdrop))
+        return 10.0, 20.0
+
+    monkeypatch.setattr(watchlist, "fetch_market_prices", fake_fetch_market_prices)
+    monkeypatch.setattr(watchlist, "WATCH_MARKET_RATE_LIMIT", 10_000)
+
+    store = WatchlistStore(str(tmp_path / "watchlist.json"))
+    store.add(subscription(1, with_backdrop=False, target=15))
+    store.add(subscription(2, with_backdrop=True, target=25))
+
+    sent = []
+
+    async def notify(chat_id, text):
+        sent.append((chat_id, text))
+
+    asyncio.run(WatchlistScheduler(store, notify).poll_once())
+
+    assert sorted(queries) == [
+        ("mrkt", "Plush Pepe", "Cozy Galaxy", "Onyx Black"),
+        ("portals", "Plush Pepe", "Cozy Galaxy", "Onyx Black"),
+        ("tonnel", "Plush Pepe", "Cozy Galaxy (1.2%)", "Onyx Black (2%)"),
+    ]
+    # Both alerts still fire: the model-only one from the model floor of the shared query.
+    assert {chat_id for chat_id, _ in sent} == {1, 2}
+    assert any("Model floor on Portals" in text for chat_id, text in sent if chat_id == 1)
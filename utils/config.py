@@ -12,6 +12,11 @@ except ValueError:
     API_ID = None
 API_HASH: Optional[str] = os.getenv("API_HASH")
 
+try:
+    ADMIN_CHAT_ID: Optional[int] = int(os.getenv("ADMIN_CHAT_ID", ""))
+except ValueError:
+    ADMIN_CHAT_ID = None
+
 CHANNEL_NAME: str = os.getenv("CHANNEL_NAME", "")
 CHANNEL_URL: str = os.getenv("CHANNEL_URL", "")
 
@@ -21,3 +26,41 @@ MRKT_URL: Optional[str] = os.getenv("MRKT_URL")
 
 SHOW_USD: bool = os.getenv("SHOW_USD", "True").lower() == "true"
 SHOW_IRR: bool = os.getenv("SHOW_IRR", "True").lower() == "true"
+
+NEGATIVE_CACHE_TTL: int = int(os.getenv("NEGATIVE_CACHE_TTL", "120"))
+NEGATIVE_CACHE_SIZE: int = int(os.getenv("NEGATIVE_CACHE_SIZE", "4096"))
+
+PRICE_CACHE_TTL: int = int(os.getenv("PRICE_CACHE_TTL", "30"))
+PRICE_CACHE_SIZE: int = int(os.getenv("PRICE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_RATE_DIGITS: int = int(os.getenv("RESPONSE_RATE_DIGITS", "4"))
+
+WATCHLIST_PATH: str = os.getenv("WATCHLIST_PATH", os.path.join("markets", "watchlist.json"))
+WATCH_INTERVAL: int = int(os.getenv("WATCH_INTERVAL", "300"))
+WATCH_MARKET_RATE_LIMIT: int = int(os.getenv("WATCH_MARKET_RATE_LIMIT", "30"))
+WATCH_MAX_PER_USER: int = int(os.getenv("WATCH_MAX_PER_USER", "10"))
+
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
+TRACE_LOG_PATH: str = os.getenv("TRACE_LOG_PATH", "traces.jsonl")
+TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_SLOW_SECONDS: float = float(os.getenv("TRACE_SLOW_SECONDS", "5"))
+
+PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+
+API_HOST: str = os.getenv("API_HOST", "127.0.0.1")
+API_PORT: int = int(os.getenv("API_PORT", "0"))
+API_BATCH_MAX: int = int(os.getenv("API_BATCH_MAX", "1000"))
+API_BATCH_CONCURRENCY: int = int(os.getenv("API_BATCH_CONCURRENCY", "16"))
+
+CATALOG_PATH: str = os.getenv("CATALOG_PATH", os.path.join("markets", "gift_catalog.json"))
+CATALOG_REFRESH_INTERVAL: int = int(os.getenv("CATALOG_REFRESH_INTERVAL", "21600"))
+CATALOG_SAVE_INTERVAL: int = int(os.getenv("CATALOG_SAVE_INTERVAL", "60"))
+
+CLIENT_PING_INTERVAL: int = int(os.getenv("CLIENT_PING_INTERVAL", "60"))
+CLIENT_PING_TIMEOUT: float = float(os.getenv("CLIENT_PING_TIMEOUT", "10"))
+CLIENT_RECONNECT_MAX_DELAY: int = int(os.getenv("CLIENT_RECONNECT_MAX_DELAY", "300"))
+CLIENT_AUTH_RETRY_INTERVAL: int = int(os.getenv("CLIENT_AUTH_RETRY_INTERVAL", "600"))
+CLIENT_WAIT_TIMEOUT: float = float(os.getenv("CLIENT_WAIT_TIMEOUT", "5"))
@@ -4,6 +4,8 @@ from functools import wraps
 from typing import Optional, Dict, Any, Callable
 import logging
 from utils.session_manager import session_manager
+from utils.config import RESPONSE_RATE_DIGITS
+from utils.metrics import track_stage
 
 log = logging.getLogger(__name__)
 
@@ -36,12 +38,21 @@ def async_ttl_cache(ttl: int) -> Callable:
                     log.info("Successfully fetched and cached new result for %s.", func.__name__)
                 return result
 
+        wrapper.cache_clear = cache.clear
         return wrapper
     return decorator
 
 
 @async_ttl_cache(ttl=200)
 async def get_rates() -> Optional[Dict[str, Optional[float]]]:
+    with track_stage("rates") as stage:
+        rates = await fetch_rates()
+        if rates is None:
+            stage.outcome = "error"
+        return rates
+
+
+async def fetch_rates() -> Optional[Dict[str, Optional[float]]]:
     ton_to_usd_rate: Optional[float] = None
     usdt_to_irr_rate: Optional[float] = None
 
@@ -90,6 +101,11 @@ async def get_rates() -> Optional[Dict[str, Optional[float]]]:
     }
 
 
+def quantize_rate(rate: Optional[float], digits: int = RESPONSE_RATE_DIGITS) -> Optional[float]:
+    """Round to `digits` significant digits, so small rate moves don't change replies or their cache key."""
+    return float(f"{rate:.{digits}g}") if rate else rate
+
+
 def ton_to_usd(ton: float, ton_usd_rate: float) -> float:
     return round(ton * ton_usd_rate, 2)
 
@@ -0,0 +1,39 @@
+import asyncio
+import importlib
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Sequence
+
+log = logging.getLogger(__name__)
+
+# Heavy libraries that are only needed once the bot talks to Telegram sessions, markets or
+# serves HTTP. They are imported off the event loop instead of at `import main`.
+DEFERRED_IMPORTS = ("curl_cffi.requests", "telethon", "aiohttp.web")
+
+
+def preload_in_background(modules: Sequence[str] = DEFERRED_IMPORTS) -> threading.Thread:
+    """Import `modules` in a daemon thread while the main thread builds the bot and connects."""
+    def run() -> None:
+        for name in modules:
+            started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                log.warning("Failed to preload %s: %s", name, e)
+            else:
+                log.debug("Preloaded %s in %.0f ms.", name, (time.perf_counter() - started) * 1000)
+
+    thread = threading.Thread(target=run, name="import-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+async def import_module_async(name: str) -> ModuleType:
+    """importlib.import_module, run in a worker thread unless the module is already loaded."""
+    module = sys.modules.get(name)
+    if module is not None and not getattr(getattr(module, "__spec__", None), "_initializing", False):
+        return module
+    return await asyncio.to_thread(importlib.import_module, name)
@@ -1,7 +1,32 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import sys
 
+from utils.config import TRACE_LOG_PATH
+from utils.tracing import TRACE_LOGGER_NAME, current_span, current_trace_id
+
+
+class TraceContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        span = current_span()
+        if span is not None:
+            span.add_event(record.levelname, record.getMessage())
+        return True
+
+
+class TraceQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
 
 def setup_logging() -> None:
     logger = logging.getLogger()
@@ -11,14 +36,34 @@ def setup_logging() -> None:
     logger.setLevel(logging.INFO)
 
     formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s (%(filename)s:%(lineno)d)'
+        '%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s (%(filename)s:%(lineno)d)'
     )
 
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
     file_handler = RotatingFileHandler('vps_errors.log', maxBytes=2*1024*1024, backupCount=5, encoding='utf-8')
     file_handler.setLevel(logging.ERROR)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
\ No newline at end of file
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(TraceContextFilter())
+    logger.addHandler(queue_handler)
+
+    trace_file_handler = RotatingFileHandler(TRACE_LOG_PATH, maxBytes=10*1024*1024, backupCount=3, encoding='utf-8')
+    trace_file_handler.setFormatter(JsonLinesFormatter())
+
+    trace_queue: queue.SimpleQueue = queue.SimpleQueue()
+    trace_logger = logging.getLogger(TRACE_LOGGER_NAME)
+    trace_logger.propagate = False
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.addHandler(TraceQueueHandler(trace_queue))
+
+    listeners = [
+        QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True),
+        QueueListener(trace_queue, trace_file_handler),
+    ]
+    for listener in listeners:
+        listener.start()
+        atexit.register(listener.stop)
@@ -0,0 +1,183 @@
+import logging
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from utils.tracing import start_span
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "gift_price_stage_seconds",
+    "Latency of each stage of the price pipeline.",
+    ("stage", "market", "outcome")
+)
+CACHE_LOOKUPS = Counter(
+    "gift_price_cache_lookups_total",
+    "Cache lookups by cache name and result.",
+    ("cache", "result")
+)
+
+TELETHON_EVENTS = Counter(
+    "gift_price_telethon_events_total",
+    "Telethon client supervisor events by session: connected, reconnect, auth_lost.",
+    ("session", "event")
+)
+
+REGISTRY = (STAGE_SECONDS, CACHE_LOOKUPS, TELETHON_EVENTS)
+
+
+def observe_stage(stage: str, seconds: float, market: str = "", outcome: str = "ok") -> None:
+    STAGE_SECONDS.observe(seconds, (stage, market, outcome))
+
+
+def count_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc((cache, "hit" if hit else "miss"))
+
+
+def count_telethon_event(session: str, event: str) -> None:
+    TELETHON_EVENTS.inc((session, event))
+
+
+class StageTimer:
+    __slots__ = ("stage", "market", "outcome", "_started", "_span")
+
+    def __init__(self, stage: str, market: str = "") -> None:
+        self.stage = stage
+        self.market = market
+        self.outcome = "ok"
+        self._started = 0.0
+        self._span = None
+
+    def __enter__(self) -> "StageTimer":
+        self._span = start_span(self.stage, market=self.market) if self.market else start_span(self.stage)
+        if self._span is not None:
+            self._span.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None and self.outcome == "ok":
+            self.outcome = "error"
+        STAGE_SECONDS.observe(time.perf_counter() - self._started, (self.stage, self.market, self.outcome))
+        if self._span is not None:
+            self._span.set(outcome=self.outcome)
+            if self.outcome == "error":
+                self._span.attributes.setdefault("error", exc_type.__name__ if exc_type else "error")
+            self._span.__exit__(exc_type, exc, tb)
+        return False
+
+
+def track_stage(stage: str, market: str = "") -> StageTimer:
+    return StageTimer(stage, market)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    def __init__(self, host: str, port: int) -> None:
+        self._host = host
+        self._port = port
+        self._runner: Optional["web.AppRunner"] = None
+
+    async def _handle_metrics(self, request: "web.Request") -> "web.Response":
+        from aiohttp import web
+
+        return web.Response(
+            body=render_metrics().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    async def start(self) -> None:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        log.info("Metrics endpoint listening on http://%s:%d/metrics", self._host, self._port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
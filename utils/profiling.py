@@ -0,0 +1,43 @@
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from utils.config import PROFILE_DIR, PROFILE_SAMPLE_RATE
+from utils.tracing import current_trace_id
+
+log = logging.getLogger(__name__)
+
+_active = False
+
+
+@asynccontextmanager
+async def maybe_profile(name: str) -> AsyncIterator[None]:
+    global _active
+    # cProfile hooks the whole thread, so only one sampled request is profiled at a time.
+    if _active or PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        yield
+        return
+
+    _active = True
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _active = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        file_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{current_trace_id() or os.getpid()}-{elapsed_ms:.0f}ms.prof"
+        path = os.path.join(PROFILE_DIR, file_name)
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            await asyncio.to_thread(profiler.dump_stats, path)
+            log.info("Saved profile of %s (%.0f ms) to %s", name, elapsed_ms, path)
+        except Exception as e:
+            log.warning("Failed to save profile to %s: %s", path, e)
@@ -0,0 +1,17 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    def __init__(self, calls_per_minute: int) -> None:
+        self._interval = 60 / calls_per_minute if calls_per_minute > 0 else 0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+                now = self._next_slot
+            self._next_slot = now + self._interval
@@ -1,17 +1,21 @@
 import asyncio
 import logging
-from typing import Optional
-from curl_cffi.requests import AsyncSession
+from typing import TYPE_CHECKING, Optional
+
+from utils.deferred_imports import import_module_async
+
+if TYPE_CHECKING:
+    from curl_cffi.requests import AsyncSession
 
 log = logging.getLogger(__name__)
 
 
 class SessionManager:
     def __init__(self) -> None:
-        self._session: Optional[AsyncSession] = None
+        self._session: Optional["AsyncSession"] = None
         self._lock = asyncio.Lock()
 
-    async def get_session(self) -> AsyncSession:
+    async def get_session(self) -> "AsyncSession":
         if self._session is not None:
             return self._session
 
@@ -21,7 +25,8 @@ class SessionManager:
 
             log.info("Creating new curl_cffi AsyncSession for Cloudflare bypass")
             
-            self._session = AsyncSession(impersonate="chrome142")
+            requests = await import_module_async("curl_cffi.requests")
+            self._session = requests.AsyncSession(impersonate="chrome142")
             
             log.info("curl_cffi AsyncSession created successfully")
 
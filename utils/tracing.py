@@ -0,0 +1,135 @@
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from utils.config import TRACE_SAMPLE_RATE, TRACE_SLOW_SECONDS
+
+TRACE_LOGGER_NAME = "gift_price.trace"
+MAX_SPANS_PER_TRACE = 200
+MAX_EVENTS_PER_SPAN = 50
+
+trace_log = logging.getLogger(TRACE_LOGGER_NAME)
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "events", "started", "ended", "_token")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[int], attributes: Dict[str, Any]) -> None:
+        self.trace = trace
+        self.span_id = len(trace.spans)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, level: str, message: str) -> None:
+        if level in ("ERROR", "CRITICAL"):
+            self.attributes.setdefault("error", message)
+        if len(self.events) < MAX_EVENTS_PER_SPAN:
+            self.events.append({
+                "t_ms": round((time.perf_counter() - self.trace.started) * 1000, 3),
+                "level": level,
+                "message": message,
+            })
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.ended = time.perf_counter()
+        if exc_type is not None:
+            self.attributes.setdefault("error", exc_type.__name__)
+        _current_span.reset(self._token)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.ended if self.ended is not None else time.perf_counter()
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.started - self.trace.started) * 1000, 3),
+            "duration_ms": round((end - self.started) * 1000, 3),
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class Trace:
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        self.trace_id = os.urandom(8).hex()
+        self.name = name
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self.root = self._new_span(name, None, attributes)
+        self._token = None
+
+    def _new_span(self, name: str, parent_id: Optional[int], attributes: Dict[str, Any]) -> Optional[Span]:
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            return None
+        span = Span(self, name, parent_id, attributes)
+        self.spans.append(span)
+        return span
+
+    def __enter__(self) -> "Trace":
+        self._token = _current_trace.set(self)
+        self.root.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.root.__exit__(exc_type, exc, tb)
+        _current_trace.reset(self._token)
+        self._export()
+        return False
+
+    def _export(self) -> None:
+        duration = self.root.ended - self.started
+        slow = TRACE_SLOW_SECONDS > 0 and duration >= TRACE_SLOW_SECONDS
+        failed = any("error" in span.attributes for span in self.spans)
+        if not (slow or failed or random.random() < TRACE_SAMPLE_RATE):
+            return
+        # Serialized by the trace handler's formatter on the logging thread.
+        trace_log.info({
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "slow": slow,
+            "failed": failed,
+            "spans": [span.to_dict() for span in self.spans],
+        })
+
+
+def start_trace(name: str, **attributes: Any) -> Trace:
+    return Trace(name, attributes)
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = _current_span.get()
+    return trace._new_span(name, parent.span_id if parent else None, attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()